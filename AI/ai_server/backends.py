@@ -0,0 +1,189 @@
+"""Offline stand-ins for the hosted embedding model and LLM.
+
+Selected with EMBEDDING_BACKEND=hashing and LLM_BACKEND=local. Both are deterministic and need
+no network or API keys, so the rest of the pipeline can be benchmarked, load-tested and run in
+CI in isolation.
+"""
+import hashlib
+import json
+import re
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+STOPWORDS = {
+    "the", "and", "for", "with", "you", "are", "our", "will", "have", "has", "this", "that", "from",
+    "your", "all", "any", "can", "who", "not", "but", "must", "should", "able", "work", "role",
+    "team", "job", "years", "year", "experience", "strong", "good", "knowledge", "skills", "using",
+    "need", "needs", "looking", "developer", "engineer", "candidate", "required", "preferred",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def usage_metadata(prompt_text: str, reply: str) -> dict:
+    """Token usage in the provider's format, estimated at ~4 characters per token."""
+    input_tokens, output_tokens = len(prompt_text) // 4 + 1, len(reply) // 4 + 1
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashed bag of words and word bigrams, L2-normalised float32 vectors."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+        self.model_name = f"local-hashing-{dimensions}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        tokens = tokenize(text)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+def _section(text: str, start_marker: str, end_marker: Optional[str] = None) -> str:
+    # The instructions mention the markers too, so the real section is the last one
+    start = text.rfind(start_marker)
+    if start == -1:
+        return ""
+    start += len(start_marker)
+    end = text.find(end_marker, start) if end_marker else -1
+    return text[start:end if end != -1 else len(text)].strip()
+
+
+def _first_match(pattern: str, text: str, default: str = "Not specified") -> str:
+    match = re.search(pattern, text, re.IGNORECASE)
+    return match.group(1).strip() if match else default
+
+
+def local_evaluation(prompt_text: str) -> dict:
+    """Score a CV against a JD by keyword overlap; deterministic for a given prompt."""
+    context = _section(prompt_text, "<context>", "</context>")
+    job_description = _section(prompt_text, "**Job Description**:")
+    name = next((line.strip() for line in context.splitlines() if line.strip()), "Not specified")
+
+    cv_terms = set(tokenize(context))
+    jd_terms = [term for term in dict.fromkeys(tokenize(job_description))
+                if len(term) > 2 and term not in STOPWORDS]
+    matched = [term for term in jd_terms if term in cv_terms]
+    missing = [term for term in jd_terms if term not in cv_terms]
+    coverage = len(matched) / len(jd_terms) if jd_terms else 0.0
+    score = int(round(40 + 55 * coverage))
+
+    strengths = [f"Mentions {term} required by the role." for term in matched[:2]]
+    weaknesses = [f"No evidence of {term}." for term in missing[:2]]
+    return {
+        "candidate_name": name[:80],
+        "eligibility": "eligible",
+        "reason": "",
+        "cgpa": _first_match(r"(?:CGPA|GPA)\s*[:\-]?\s*(\d+(?:\.\d+)?)", context),
+        "degree": _first_match(r"\b(B\.?\s?Tech|B\.?\s?E\.?|B\.?\s?Sc|M\.?\s?Tech|M\.?\s?Sc|Bachelor[^\n,]*|Master[^\n,]*)", context),
+        "course": _first_match(r"(?:B\.?\s?Tech|Bachelor[^\n,]*?)\s*(?:-|in|,)\s*([A-Za-z &]+)", context),
+        "ats_score": score,
+        "strengths": strengths or ["CV is readable and structured."],
+        "weaknesses": weaknesses or ["No notable gaps against the job description."],
+        "feedback": "\n".join([
+            "- Candidate is eligible for the role.",
+            f"- Covers {len(matched)} of {len(jd_terms)} key job description terms.",
+            "- Review the listed gaps before shortlisting.",
+        ]),
+        "detailed_feedback": "\n".join(
+            [f"- Mentions {term}." for term in matched[:5]] + [f"- Missing {term}." for term in missing[:4]]
+        ),
+    }
+
+
+def render_markdown(result: dict) -> str:
+    """The evaluation in the markdown format that parse_output expects."""
+    return "\n".join([
+        f"**Applicant Name**: {result['candidate_name']}",
+        "",
+        f"**College CGPA/Percentage**: {result['cgpa']}",
+        "",
+        f"**Degree**: {result['degree']}",
+        "",
+        f"**Course/Major**: {result['course']}",
+        "",
+        f"**ATS Score**: {result['ats_score']}/100",
+        "",
+        "**Strengths**:",
+        *[f"- {line}" for line in result["strengths"]],
+        "",
+        "**Weaknesses**:",
+        *[f"- {line}" for line in result["weaknesses"]],
+        "",
+        "**Feedback**:",
+        result["feedback"],
+        "",
+        "**Detailed Feedback**:",
+        result["detailed_feedback"],
+    ])
+
+
+class LocalEvaluatorChatModel(BaseChatModel):
+    """Chat model that answers the evaluation prompt locally in whichever format it asks for."""
+
+    model_name: str = "local-evaluator"
+    stream_chunk_size: int = 24
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-evaluator"
+
+    @staticmethod
+    def _prompt_text(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        # A JSON repair re-ask repeats the evaluation prompt before the earlier reply; answer that prompt
+        # again, which always yields a complete, schema-valid object
+        first_reply = next((index for index, message in enumerate(messages) if isinstance(message, AIMessage)), None)
+        prompt_text = self._prompt_text(messages[:first_reply])
+        result = local_evaluation(prompt_text)
+        if "single JSON object" in prompt_text:
+            return json.dumps(result)
+        return render_markdown(result)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        reply = self._reply(messages)
+        message = AIMessage(content=reply, usage_metadata=usage_metadata(self._prompt_text(messages), reply))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply(messages)
+        for start in range(0, len(reply), self.stream_chunk_size):
+            end = start + self.stream_chunk_size
+            # Usage rides on the last chunk, as with providers that report it at the end of a stream
+            usage = usage_metadata(self._prompt_text(messages), reply) if end >= len(reply) else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=reply[start:end], usage_metadata=usage))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,347 @@
+"""Benchmark the CV evaluation pipeline stage by stage.
+
+Runs each CV in a corpus (the sample PDFs given with --cv plus generated DOCX CVs of varying
+length) through load, split, embed, index, retrieve, LLM and parse, timing every stage, and then
+through analyze_cv end to end. By default the offline backends are used (local stand-in LLM and
+hashing embeddings), so runs are deterministic, free and comparable across commits; --hosted
+uses whatever LLM_BACKEND / EMBEDDING_BACKEND the environment configures.
+
+It also measures how long the CLI (rag) and server (main) modules take to import in a fresh
+interpreter and checks that against a budget; --import-time runs only that check and exits non-zero
+when a module is over budget, so slow top-level imports are caught before they ship.
+
+    python benchmark.py --synthetic 20 --iterations 3 --output bench.json
+    python benchmark.py --import-time
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import zipfile
+from collections import defaultdict
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CVS = [os.path.join(HERE, os.pardir, "AAGAM_220123002.pdf")]
+
+STAGES = ("load", "split", "embed", "index", "retrieve", "llm", "parse")
+
+# Median import time allowed per module, measured in a fresh interpreter; rag is what the CLI and
+# every worker pays before doing anything, main adds FastAPI on top
+IMPORT_TIME_BUDGETS_MS = {
+    "rag": float(os.getenv("IMPORT_BUDGET_RAG_MS", "500")),
+    "main": float(os.getenv("IMPORT_BUDGET_MAIN_MS", "1500")),
+}
+IMPORT_TIME_RUNS = 5
+
+DEFAULT_JD = (
+    "We are hiring a backend engineer to build data pipelines and ML services. Requirements: "
+    "Python, SQL, Docker, Kubernetes, AWS, REST APIs, machine learning, PyTorch, CI/CD. "
+    "B.Tech in Computer Science or a related field; strong communication and ownership."
+)
+
+FIRST_NAMES = ["Aarav", "Diya", "Kabir", "Meera", "Rohan", "Sara", "Vikram", "Ananya", "Ishaan", "Priya"]
+LAST_NAMES = ["Sharma", "Iyer", "Mehta", "Reddy", "Gupta", "Nair", "Kapoor", "Das", "Joshi", "Rao"]
+SKILLS = [
+    "Python", "Java", "C++", "SQL", "PostgreSQL", "MongoDB", "Docker", "Kubernetes", "AWS", "GCP",
+    "React", "Node.js", "FastAPI", "Django", "PyTorch", "TensorFlow", "scikit-learn", "Spark",
+    "Airflow", "Terraform", "Git", "Linux", "REST APIs", "GraphQL", "CI/CD", "Kafka",
+]
+VERBS = ["Built", "Designed", "Led", "Optimised", "Migrated", "Automated", "Shipped", "Maintained"]
+OBJECTS = [
+    "a real-time analytics pipeline", "the payments service", "an internal ML platform",
+    "a recommendation engine", "customer-facing dashboards", "the CI/CD workflow",
+    "a document search service", "data ingestion jobs",
+]
+OUTCOMES = [
+    "cutting latency by 40%", "serving 2M requests a day", "reducing cloud spend by a third",
+    "improving model accuracy by 6 points", "with zero downtime", "for a team of twelve engineers",
+]
+
+
+def synthetic_cv_text(rng, pages):
+    """Deterministic CV-like paragraphs, grouped into the given number of pages."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(6, 12))
+    header = [
+        name,
+        f"Email: {name.lower().replace(' ', '.')}@example.com",
+        f"B.Tech in Computer Science, CGPA: {rng.uniform(6.5, 9.8):.2f}",
+        "Skills: " + ", ".join(skills),
+    ]
+    result = []
+    for page in range(pages):
+        paragraphs = header if page == 0 else []
+        paragraphs = paragraphs + [f"Experience {page + 1}"]
+        for _ in range(rng.randint(24, 32)):
+            paragraphs.append(
+                f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)} and "
+                f"{rng.choice(skills)}, {rng.choice(OUTCOMES)}."
+            )
+        result.append(paragraphs)
+    return result
+
+
+def docx_bytes(pages):
+    """A minimal DOCX with one paragraph per line and explicit page breaks between pages."""
+    body = []
+    for index, paragraphs in enumerate(pages):
+        if index:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        body.extend(f"<w:p><w:r><w:t>{escape(text)}</w:t></w:r></w:p>" for text in paragraphs)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{''.join(body)}</w:body></w:document>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def build_corpus(cv_paths, synthetic, seed):
+    """(filename, bytes) pairs: the given files first, then synthetic CVs of 1-8 pages."""
+    corpus = []
+    for path in cv_paths:
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read()))
+    rng = random.Random(seed)
+    for index in range(synthetic):
+        corpus.append((f"synthetic_{index:03d}.docx", docx_bytes(synthetic_cv_text(rng, rng.randint(1, 8)))))
+    return corpus
+
+
+def summarize(samples):
+    seconds = np.asarray(samples, dtype=np.float64)
+    return {
+        "count": int(seconds.size),
+        "p50_ms": round(float(np.percentile(seconds, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(seconds, 95)) * 1000, 3),
+        "mean_ms": round(float(seconds.mean()) * 1000, 3),
+        "max_ms": round(float(seconds.max()) * 1000, 3),
+        "throughput_per_s": round(seconds.size / seconds.sum(), 3) if seconds.sum() else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure_import_time(module, runs=IMPORT_TIME_RUNS):
+    """Seconds to import module in each of runs fresh interpreters, excluding interpreter startup."""
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=HERE, env=os.environ, capture_output=True, text=True, check=True
+        )
+        samples.append(float(completed.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def import_time_report(runs=IMPORT_TIME_RUNS):
+    report = {}
+    for module, budget_ms in IMPORT_TIME_BUDGETS_MS.items():
+        stats = summarize(measure_import_time(module, runs))
+        report[module] = {**stats, "budget_ms": budget_ms, "within_budget": stats["p50_ms"] <= budget_ms}
+    return report
+
+
+def print_import_times(import_time):
+    print(f"{'import':<12}{'runs':>7}{'p50 ms':>11}{'max ms':>11}{'budget ms':>11}")
+    for module, stats in import_time.items():
+        flag = "" if stats["within_budget"] else "  OVER BUDGET"
+        print(f"{module:<12}{stats['count']:>7}{stats['p50_ms']:>11.3f}{stats['max_ms']:>11.3f}"
+              f"{stats['budget_ms']:>11.1f}{flag}")
+
+
+def run(args):
+    # Imported here so the backend selection in main() takes effect before the registry reads it
+    import rag
+    from cv_document import CVDocument
+    from extraction import extraction_cache
+    from prompts import CACHE_PROMPT_VERSION
+    from registry import registry, LLM_BACKEND, EMBEDDING_BACKEND
+
+    logging.getLogger().setLevel(logging.WARNING)
+    job_description = args.jd
+    corpus = build_corpus(args.cv, args.synthetic, args.seed)
+    embeddings = registry.get_embeddings()
+    document_chain = registry.get_document_chain(args.model)
+
+    def evaluate_staged(filename, data, timings):
+        cv = CVDocument.from_bytes(data, filename)
+        try:
+            start = time.perf_counter()
+            pages = rag.load_cv_pages(cv)
+            timings["load"].append(time.perf_counter() - start)
+
+            mode = rag.choose_mode(pages) if args.mode == "auto" else args.mode
+            context = pages
+            if mode == rag.RETRIEVAL_MODE:
+                start = time.perf_counter()
+                chunks = rag.get_text_splitter().split_documents(pages)
+                timings["split"].append(time.perf_counter() - start)
+
+                texts = [chunk.page_content for chunk in chunks]
+                start = time.perf_counter()
+                vectors = embeddings.embed_documents(texts)
+                jd_vector = embeddings.embed_query(job_description)
+                timings["embed"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                db = rag.build_index(chunks, vectors)
+                timings["index"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                context = db.similarity_search_by_vector(jd_vector, k=rag.RETRIEVAL_K)
+                timings["retrieve"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            output = document_chain.invoke({"context": context, "input": job_description})
+            timings["llm"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            rag.finish_output(output, args.model, context, job_description)
+            timings["parse"].append(time.perf_counter() - start)
+            return mode
+        finally:
+            cv.close()
+
+    def evaluate_end_to_end(filename, data):
+        cv = CVDocument.from_bytes(data, filename)
+        try:
+            start = time.perf_counter()
+            result = rag.analyze_cv(cv, job_description, model_name=args.model, use_cache=False)
+            elapsed = time.perf_counter() - start
+        finally:
+            cv.close()
+        if result.get("eligibility") == "error":
+            raise RuntimeError(f"{filename}: {result.get('reason')}")
+        return elapsed
+
+    for _ in range(args.warmup):
+        for filename, data in corpus:
+            extraction_cache.clear()
+            evaluate_staged(filename, data, defaultdict(list))
+
+    timings = defaultdict(list)
+    end_to_end = []
+    modes = {}
+    wall_start = time.perf_counter()
+    for _ in range(args.iterations):
+        for filename, data in corpus:
+            # Every iteration measures a cold extraction, not the in-process page cache
+            extraction_cache.clear()
+            modes[filename] = evaluate_staged(filename, data, timings)
+            extraction_cache.clear()
+            end_to_end.append(evaluate_end_to_end(filename, data))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "llm_backend": LLM_BACKEND,
+            "embedding_backend": EMBEDDING_BACKEND,
+            "model": args.model,
+            "embedding_model": getattr(embeddings, "model_name", None),
+            "mode": args.mode,
+            "chunk_size": rag.CHUNK_SIZE,
+            "chunk_overlap": rag.CHUNK_OVERLAP,
+            "retrieval_k": rag.RETRIEVAL_K,
+            "context_token_budget": rag.CONTEXT_TOKEN_BUDGET,
+            "prompt_version": CACHE_PROMPT_VERSION,
+            "pdf_backend": os.getenv("PDF_BACKEND", "auto"),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "corpus": [
+            {"filename": filename, "bytes": len(data), "mode": modes.get(filename)}
+            for filename, data in corpus
+        ],
+        "stages": {stage: summarize(timings[stage]) for stage in STAGES if timings[stage]},
+        "end_to_end": summarize(end_to_end),
+        "wall_seconds": round(wall, 3),
+        "import_time": import_time_report(),
+    }
+
+
+def print_report(report):
+    print(f"commit {report['commit']}  {report['config']['llm_backend']}/{report['config']['embedding_backend']}  "
+          f"{len(report['corpus'])} CVs x {report['config']['iterations']} iterations")
+    print(f"{'stage':<12}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'mean ms':>11}{'per s':>11}")
+    rows = list(report["stages"].items()) + [("end_to_end", report["end_to_end"])]
+    for stage, stats in rows:
+        print(f"{stage:<12}{stats['count']:>7}{stats['p50_ms']:>11.3f}{stats['p95_ms']:>11.3f}"
+              f"{stats['mean_ms']:>11.3f}{stats['throughput_per_s'] or 0:>11.1f}")
+    print_import_times(report["import_time"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cv", action="append", default=None, help="CV file to include (repeatable)")
+    parser.add_argument("--synthetic", type=int, default=20, help="Number of generated DOCX CVs to add")
+    parser.add_argument("--iterations", type=int, default=3, help="Measured passes over the corpus")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured passes before measuring")
+    parser.add_argument("--mode", choices=("auto", "retrieval", "full_context"), default="auto",
+                        help="auto picks per CV as the server does; retrieval forces split/embed/index/retrieve")
+    parser.add_argument("--jd", default=DEFAULT_JD, help="Job description text")
+    parser.add_argument("--model", default=None, help="LLM model name (defaults to LLM_MODEL)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the synthetic corpus")
+    parser.add_argument("--hosted", action="store_true", help="Use the configured hosted backends instead of the local ones")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--import-time", action="store_true",
+                        help="Only measure module import times and exit 1 if any is over budget")
+    args = parser.parse_args(argv)
+    args.cv = args.cv if args.cv is not None else DEFAULT_CVS
+
+    if not args.hosted:
+        os.environ["LLM_BACKEND"] = "local"
+        os.environ["EMBEDDING_BACKEND"] = "hashing"
+    sys.path.insert(0, HERE)
+    if args.model is None:
+        from registry import DEFAULT_LLM_MODEL
+        args.model = DEFAULT_LLM_MODEL
+
+    if args.import_time:
+        report = {"commit": git_commit(), "import_time": import_time_report()}
+        print_import_times(report["import_time"])
+    else:
+        report = run(args)
+        print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    if not all(stats["within_budget"] for stats in report["import_time"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""Persistent per-job-role vector index of candidate CV chunks.
+
+Each job role has its own directory holding vectors.f32 (row-major float32, one L2-normalised row
+per CV chunk) and chunks.jsonl (one metadata line per row), plus index.json naming the embedding
+model. Adding a new candidate appends to both files in place; re-indexing or removing a candidate
+rewrites the role's files, which is rare.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "candidate_index")
+CANDIDATE_INDEX_DIR = os.getenv("CANDIDATE_INDEX_DIR", DEFAULT_INDEX_DIR)
+# Characters of the best-matching chunk returned with each search hit
+SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "300"))
+# Rows scored per matrix multiply when matching a role against whole indexes; bounds the
+# temporary score matrix to MATCH_CHUNK_ROWS x queries float32s
+MATCH_CHUNK_ROWS = int(os.getenv("MATCH_CHUNK_ROWS", "8192"))
+
+_ROLE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class IndexModelMismatch(ValueError):
+    """The role's index was built with a different embedding model than the one in use."""
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class RoleIndex:
+    """Chunk vectors and metadata for one job role, loaded into memory and mirrored on disk."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.model: Optional[str] = None
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.rows: List[dict] = []
+        self.lock = threading.Lock()
+        self._load()
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _rows_path(self):
+        return os.path.join(self.directory, "chunks.jsonl")
+
+    @property
+    def _info_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    @property
+    def dimensions(self) -> int:
+        return self.vectors.shape[1]
+
+    def _load(self):
+        if not os.path.exists(self._info_path):
+            return
+        with open(self._info_path) as f:
+            info = json.load(f)
+        self.model = info["model"]
+        vectors = np.fromfile(self._vectors_path, dtype=np.float32) if os.path.exists(self._vectors_path) else np.zeros(0, np.float32)
+        rows = []
+        if os.path.exists(self._rows_path):
+            with open(self._rows_path) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+        vectors = vectors[:len(vectors) - len(vectors) % info["dimensions"]].reshape(-1, info["dimensions"])
+        count = min(len(vectors), len(rows))
+        self.vectors, self.rows = vectors[:count], rows[:count]
+        if count != len(vectors) or count != len(rows):
+            # An append was interrupted between the two files; drop the unmatched tail
+            logger.warning(f"Repairing candidate index {self.directory}: keeping {count} complete rows")
+            self._rewrite()
+
+    def _write_info(self):
+        with open(self._info_path, "w") as f:
+            json.dump({"model": self.model, "dimensions": self.dimensions}, f)
+
+    def _rewrite(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_info()
+        self.vectors.tofile(self._vectors_path + ".tmp")
+        with open(self._rows_path + ".tmp", "w") as f:
+            f.writelines(json.dumps(row) + "\n" for row in self.rows)
+        os.replace(self._vectors_path + ".tmp", self._vectors_path)
+        os.replace(self._rows_path + ".tmp", self._rows_path)
+
+    def _append(self, vectors: np.ndarray, rows: List[dict]):
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._rows_path, "a") as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows)
+        self.vectors = np.concatenate([self.vectors, vectors]) if len(self.rows) else vectors
+        self.rows.extend(rows)
+
+    def _check_model(self, model: str, dimensions: int):
+        if self.rows and (model != self.model or dimensions != self.dimensions):
+            raise IndexModelMismatch(
+                f"Index was built with {self.model} ({self.dimensions} dims), not {model} ({dimensions} dims); "
+                "drop and rebuild it to switch models"
+            )
+
+    def add(self, candidate_id: str, texts: List[str], vectors, model: str, metadata: Optional[dict] = None) -> int:
+        """Index a candidate's chunks, replacing any rows already stored for that candidate."""
+        vectors = normalize_rows(vectors)
+        if len(texts) != len(vectors):
+            raise ValueError("Expected one vector per chunk")
+        rows = [{"candidate_id": candidate_id, "text": text, **(metadata or {})} for text in texts]
+        with self.lock:
+            self._check_model(model, vectors.shape[1])
+            if not self.rows:
+                self.model = model
+                self.vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+                os.makedirs(self.directory, exist_ok=True)
+                self._write_info()
+            if any(row["candidate_id"] == candidate_id for row in self.rows):
+                self._remove_rows(candidate_id)
+                self.vectors = np.concatenate([self.vectors, vectors])
+                self.rows.extend(rows)
+                self._rewrite()
+            else:
+                self._append(vectors, rows)
+        return len(rows)
+
+    def _remove_rows(self, candidate_id: str) -> int:
+        keep = [index for index, row in enumerate(self.rows) if row["candidate_id"] != candidate_id]
+        removed = len(self.rows) - len(keep)
+        self.vectors = self.vectors[keep]
+        self.rows = [self.rows[index] for index in keep]
+        return removed
+
+    def remove(self, candidate_id: str) -> int:
+        with self.lock:
+            removed = self._remove_rows(candidate_id)
+            if removed:
+                self._rewrite()
+            return removed
+
+    def search(self, query_vector, model: str, k: int = 10) -> List[dict]:
+        """Top-k candidates ranked by their best-matching chunk's cosine similarity to the query."""
+        query = normalize_rows(query_vector)[0]
+        with self.lock:
+            if not self.rows:
+                return []
+            self._check_model(model, len(query))
+            scores = self.vectors @ query
+            results, seen = [], set()
+            for row_index in np.argsort(-scores):
+                row = self.rows[row_index]
+                if row["candidate_id"] in seen:
+                    continue
+                seen.add(row["candidate_id"])
+                hit = {key: value for key, value in row.items() if key != "text"}
+                hit["score"] = round(float(scores[row_index]), 6)
+                hit["snippet"] = row["text"][:SNIPPET_CHARS]
+                results.append(hit)
+                if len(results) == k:
+                    break
+            return results
+
+    def best_scores(self, queries: np.ndarray, model: str, chunk_rows: int = MATCH_CHUNK_ROWS):
+        """Per-candidate best cosine similarity to each query row, scored chunk_rows rows at a time.
+
+        Returns (candidate rows, scores) where scores has shape (candidates, queries) and each
+        candidate row is the metadata and text of that candidate's best chunk for the first query.
+        """
+        with self.lock:
+            if not self.rows:
+                return [], np.zeros((0, len(queries)), dtype=np.float32)
+            self._check_model(model, queries.shape[1])
+            codes, first_rows = {}, []
+            for index, row in enumerate(self.rows):
+                if row["candidate_id"] not in codes:
+                    codes[row["candidate_id"]] = len(codes)
+                    first_rows.append(index)
+            row_codes = np.fromiter((codes[row["candidate_id"]] for row in self.rows), dtype=np.int64, count=len(self.rows))
+            best = np.full((len(codes), len(queries)), -np.inf, dtype=np.float32)
+            best_rows = np.array(first_rows, dtype=np.int64)
+            for start in range(0, len(self.rows), chunk_rows):
+                block_codes = row_codes[start:start + chunk_rows]
+                scores = self.vectors[start:start + chunk_rows] @ queries.T
+                np.maximum.at(best, block_codes, scores)
+                # Remember which row produced each candidate's best first-query score, for the snippet
+                improved = scores[:, 0] >= best[block_codes, 0]
+                best_rows[block_codes[improved]] = start + np.flatnonzero(improved)
+            return [self.rows[index] for index in best_rows], best
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "model": self.model,
+                "chunks": len(self.rows),
+                "candidates": len({row["candidate_id"] for row in self.rows}),
+            }
+
+
+class CandidateIndex:
+    """All job roles' indexes under one directory, each loaded lazily on first use."""
+
+    def __init__(self, directory: str = CANDIDATE_INDEX_DIR):
+        self.directory = directory
+        self._roles: Dict[str, RoleIndex] = {}
+        self._lock = threading.Lock()
+
+    def role(self, job_role_id: str) -> RoleIndex:
+        if not _ROLE_ID_RE.match(job_role_id):
+            raise ValueError(f"Invalid job role id: {job_role_id!r}")
+        with self._lock:
+            if job_role_id not in self._roles:
+                self._roles[job_role_id] = RoleIndex(os.path.join(self.directory, job_role_id))
+            return self._roles[job_role_id]
+
+    def add(self, job_role_id: str, candidate_id: str, texts: List[str], vectors, model: str,
+            metadata: Optional[dict] = None) -> int:
+        metadata = {**(metadata or {}), "indexed_at": time.time()}
+        return self.role(job_role_id).add(candidate_id, texts, vectors, model, metadata)
+
+    def remove(self, job_role_id: str, candidate_id: str) -> int:
+        return self.role(job_role_id).remove(candidate_id)
+
+    def search(self, job_role_id: str, query_vector, model: str, k: int = 10) -> List[dict]:
+        return self.role(job_role_id).search(query_vector, model, k)
+
+    def match(self, job_role_ids: List[str], query_vectors, model: str, k: int = 20,
+              weights: Optional[List[float]] = None, chunk_rows: int = MATCH_CHUNK_ROWS) -> dict:
+        """Rank every candidate indexed under the given roles against one or more query vectors.
+
+        A candidate's score is the weighted mean over queries of its best chunk's similarity. The
+        same CV indexed under several roles is only returned once, with its best score.
+        """
+        queries = normalize_rows(query_vectors)
+        weights = np.asarray(weights if weights is not None else [1.0] * len(queries), dtype=np.float32)
+        weights = weights / weights.sum()
+        best = {}
+        scored = 0
+        for job_role_id in job_role_ids:
+            rows, scores = self.role(job_role_id).best_scores(queries, model, chunk_rows)
+            scored += len(rows)
+            for row, score in zip(rows, (scores @ weights).tolist()):
+                key = row.get("cv_sha256") or (job_role_id, row["candidate_id"])
+                if key not in best or score > best[key][0]:
+                    best[key] = (score, job_role_id, row)
+        ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)[:k]
+        results = []
+        for score, job_role_id, row in ranked:
+            hit = {key: value for key, value in row.items() if key != "text"}
+            hit.update(job_role_id=job_role_id, score=round(score, 6), snippet=row["text"][:SNIPPET_CHARS])
+            results.append(hit)
+        return {"candidates_scored": scored, "results": results}
+
+    def drop(self, job_role_id: str) -> bool:
+        role = self.role(job_role_id)
+        with self._lock, role.lock:
+            self._roles.pop(job_role_id, None)
+            if not os.path.isdir(role.directory):
+                return False
+            shutil.rmtree(role.directory)
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            roles = list(self._roles.values())
+        loaded = [role.stats() for role in roles]
+        return {
+            "loaded_roles": len(loaded),
+            "chunks": sum(role["chunks"] for role in loaded),
+            "candidates": sum(role["candidates"] for role in loaded),
+        }
+
+
+_default_index: Optional[CandidateIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_candidate_index() -> CandidateIndex:
+    """Process-wide index instance."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = CandidateIndex()
+        return _default_index
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Uploads up to this size stay in memory; larger ones roll over to an anonymous temp file,
+# which is unique per upload and removed by the OS as soon as it is closed.
+IN_MEMORY_UPLOAD_LIMIT = int(os.getenv("IN_MEMORY_UPLOAD_LIMIT", str(8 * 1024 * 1024)))
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class CVDocument:
+    """A CV's bytes plus its original filename, held in a spooled buffer rather than a named file."""
+
+    def __init__(self, filename, buffer):
+        self.filename = filename or "cv"
+        self.extension = os.path.splitext(self.filename)[1].lower()
+        self._buffer = buffer
+        self._lock = threading.Lock()
+        self._sha256 = None
+
+    @classmethod
+    def from_fileobj(cls, fileobj, filename):
+        buffer = tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_UPLOAD_LIMIT)
+        shutil.copyfileobj(fileobj, buffer, COPY_CHUNK_SIZE)
+        buffer.seek(0)
+        return cls(filename, buffer)
+
+    @classmethod
+    def from_bytes(cls, data, filename):
+        buffer = tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_UPLOAD_LIMIT)
+        buffer.write(data)
+        buffer.seek(0)
+        return cls(filename, buffer)
+
+    @classmethod
+    def from_path(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_fileobj(f, os.path.basename(path))
+
+    @property
+    def in_memory(self):
+        return not getattr(self._buffer, "_rolled", False)
+
+    @property
+    def sha256(self):
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            with self._lock:
+                self._buffer.seek(0)
+                for block in iter(lambda: self._buffer.read(COPY_CHUNK_SIZE), b""):
+                    digest.update(block)
+                self._buffer.seek(0)
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def read_bytes(self):
+        with self._lock:
+            self._buffer.seek(0)
+            data = self._buffer.read()
+            self._buffer.seek(0)
+            return data
+
+    def read_head(self, size):
+        with self._lock:
+            self._buffer.seek(0)
+            data = self._buffer.read(size)
+            self._buffer.seek(0)
+            return data
+
+    @contextmanager
+    def reading(self):
+        """Exclusive access to the rewound, seekable buffer; callers must not close it."""
+        with self._lock:
+            self._buffer.seek(0)
+            yield self._buffer
+
+    def close(self):
+        self._buffer.close()
+
+
+def as_cv_document(cv):
+    """Accept a CVDocument or, for the CLI and older callers, a path on disk."""
+    if isinstance(cv, CVDocument):
+        return cv
+    return CVDocument.from_path(cv)
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings.sqlite3")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding store keyed by sha256(model, kind, text), evicted LRU by total size."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, text: str, kind: str = "document") -> str:
+        digest = hashlib.sha256()
+        for part in (model, kind, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Return the cached vector for each key (None on a miss) and bump hits' recency."""
+        if not keys:
+            return []
+        found = {}
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for vector in results if vector is not None)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return results
+
+    def put_many(self, model: str, keys: List[str], vectors: List[List[float]]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in zip(keys, vectors):
+            blob = array("f", vector).tobytes()
+            rows.append((key, model, blob, len(blob), now))
+        with self._lock:
+            for key, _, blob, size, _ in rows:
+                previous = self._conn.execute("SELECT size FROM embeddings WHERE key = ?", (key,)).fetchone()
+                self._total_bytes += size - (previous[0] if previous else 0)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used rows until the store is back under 90% of max_bytes."""
+        target = int(self.max_bytes * 0.9)
+        cursor = self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used ASC")
+        doomed = []
+        freed = 0
+        for key, size in cursor:
+            if self._total_bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        cursor.close()
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._total_bytes -= freed
+        self.evictions += len(doomed)
+        logger.info(f"Evicted {len(doomed)} cached embeddings ({freed} bytes)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._total_bytes = 0
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the underlying model for texts not already in the cache."""
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache: Optional[EmbeddingCache] = None):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache or get_embedding_cache()
+
+    def _lookup(self, texts: List[str]):
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = {}
+        for index, (key, vector) in enumerate(zip(keys, vectors)):
+            if vector is None:
+                missing.setdefault(key, []).append(index)
+        return vectors, missing
+
+    def _fill(self, vectors, missing, fresh) -> List[List[float]]:
+        self.cache.put_many(self.model_name, list(missing), fresh)
+        for key, vector in zip(missing, fresh):
+            for index in missing[key]:
+                vectors[index] = vector
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = self._lookup(texts)
+        if not missing:
+            return vectors
+        fresh = self.underlying.embed_documents([texts[indexes[0]] for indexes in missing.values()])
+        return self._fill(vectors, missing, fresh)
+
+    # The async variants run the SQLite lookups and writes on a worker thread, off the event loop
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors, missing = await asyncio.to_thread(self._lookup, texts)
+        if not missing:
+            return vectors
+        fresh = await self.underlying.aembed_documents([texts[indexes[0]] for indexes in missing.values()])
+        return await asyncio.to_thread(self._fill, vectors, missing, fresh)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = EmbeddingCache.make_key(self.model_name, text, kind="query")
+        vector = self.cache.get_many([key])[0]
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self.cache.put_many(self.model_name, [key], [vector])
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = EmbeddingCache.make_key(self.model_name, text, kind="query")
+        vector = (await asyncio.to_thread(self.cache.get_many, [key]))[0]
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            await asyncio.to_thread(self.cache.put_many, self.model_name, [key], [vector])
+        return vector
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache instance, opened on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
@@ -0,0 +1,255 @@
+"""CV text extraction: fast PDF backends with page-parallel extraction, a streaming DOCX reader,
+and an in-memory cache of extracted pages keyed by file content hash.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import List, Optional
+from xml.etree.ElementTree import iterparse
+
+from langchain_core.documents import Document
+
+import metrics
+from cv_document import CVDocument, as_cv_document
+
+logger = logging.getLogger(__name__)
+
+# auto picks the fastest installed backend: pypdfium2, then PyMuPDF, then pypdf
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+# PDFs with at least this many pages are split across EXTRACT_PROCESSES worker processes;
+# the PDF libraries hold the GIL (or are not thread-safe), so threads would not help.
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PARALLEL_PAGE_THRESHOLD", "8"))
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "256"))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc")
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _pdf_backend():
+    candidates = ["pdfium", "pymupdf", "pypdf"] if PDF_BACKEND == "auto" else [PDF_BACKEND]
+    for backend in candidates:
+        try:
+            if backend == "pdfium":
+                import pypdfium2  # noqa: F401
+            elif backend == "pymupdf":
+                import fitz  # noqa: F401
+            elif backend == "pypdf":
+                import pypdf  # noqa: F401
+            else:
+                raise ValueError(f"Unknown PDF_BACKEND: {backend}")
+            return backend
+        except ImportError:
+            continue
+    raise RuntimeError(f"No PDF backend available (tried: {', '.join(candidates)})")
+
+
+def _open_pdf(data, backend):
+    """Open a PDF from bytes or a seekable binary buffer."""
+    if backend == "pdfium":
+        import pypdfium2
+        return pypdfium2.PdfDocument(data)
+    if backend == "pymupdf":
+        import fitz
+        return fitz.open(stream=data if isinstance(data, bytes) else data.read(), filetype="pdf")
+    import pypdf
+    return pypdf.PdfReader(data if not isinstance(data, bytes) else io.BytesIO(data))
+
+
+def _pdf_page_texts(pdf, backend, start, stop):
+    texts = []
+    if backend == "pdfium":
+        for index in range(start, stop):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    elif backend == "pymupdf":
+        texts = [pdf[index].get_text() for index in range(start, stop)]
+    else:
+        texts = [pdf.pages[index].extract_text() or "" for index in range(start, stop)]
+    return texts
+
+
+def _pdf_page_count(pdf, backend):
+    if backend == "pymupdf":
+        return pdf.page_count
+    if backend == "pypdf":
+        return len(pdf.pages)
+    return len(pdf)
+
+
+def _close_pdf(pdf, backend):
+    if backend in ("pdfium", "pymupdf"):
+        pdf.close()
+
+
+# PDFium and MuPDF are not thread-safe: every call into them in this process goes through this
+# lock, so concurrent uploads on the parse executor take turns instead of crashing the server
+_pdf_lock = threading.Lock()
+
+
+def _pdf_guard(backend):
+    return _pdf_lock if backend in ("pdfium", "pymupdf") else nullcontext()
+
+
+def _pdf_page_range(data, backend, start, stop):
+    """Extract text for pages [start, stop) of a PDF given as bytes. Top-level so it can run in a worker process."""
+    pdf = _open_pdf(data, backend)
+    try:
+        return _pdf_page_texts(pdf, backend, start, stop)
+    finally:
+        _close_pdf(pdf, backend)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned, not forked: forking a multithreaded server can deadlock the child on a held lock
+            _process_pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def extract_pdf(cv: CVDocument) -> List[str]:
+    backend = _pdf_backend()
+    with cv.reading() as buffer, _pdf_guard(backend):
+        pdf = _open_pdf(buffer, backend)
+        try:
+            page_count = _pdf_page_count(pdf, backend)
+            if page_count < PARALLEL_PAGE_THRESHOLD or EXTRACT_PROCESSES < 2:
+                return _pdf_page_texts(pdf, backend, 0, page_count)
+        finally:
+            _close_pdf(pdf, backend)
+
+    # Worker processes get their own copy of the bytes and parse a contiguous page range each
+    data = cv.read_bytes()
+    step = -(-page_count // EXTRACT_PROCESSES)
+    pool = _get_process_pool()
+    futures = [
+        pool.submit(_pdf_page_range, data, backend, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    return [text for future in futures for text in future.result()]
+
+
+def extract_docx(cv: CVDocument) -> List[str]:
+    """Stream word/document.xml with iterparse, splitting pages on explicit page breaks."""
+    pages, paragraphs, runs = [], [], []
+    with cv.reading() as buffer, zipfile.ZipFile(buffer) as archive:
+        with archive.open("word/document.xml") as xml:
+            for _, element in iterparse(xml, events=("end",)):
+                tag = element.tag
+                if tag == _WORD_NS + "t":
+                    runs.append(element.text or "")
+                elif tag == _WORD_NS + "tab":
+                    runs.append("\t")
+                elif tag in (_WORD_NS + "br", _WORD_NS + "cr"):
+                    if element.get(_WORD_NS + "type") == "page":
+                        paragraphs.append("".join(runs))
+                        runs = []
+                        pages.append("\n".join(paragraphs))
+                        paragraphs = []
+                    else:
+                        runs.append("\n")
+                elif tag == _WORD_NS + "p":
+                    paragraphs.append("".join(runs))
+                    runs = []
+                    element.clear()
+                elif tag == _WORD_NS + "body":
+                    element.clear()
+    if runs:
+        paragraphs.append("".join(runs))
+    pages.append("\n".join(paragraphs))
+    return [page for page in pages if page.strip()] or [""]
+
+
+def extract_doc(cv: CVDocument) -> List[str]:
+    """Legacy .doc: many are really DOCX renamed; true Word 97 binaries need antiword."""
+    if cv.read_head(2) == b"PK":
+        return extract_docx(cv)
+    if shutil.which("antiword"):
+        # antiword only reads from a path; the named file is unique and removed straight after
+        with tempfile.NamedTemporaryFile(suffix=".doc") as tmp:
+            with cv.reading() as buffer:
+                shutil.copyfileobj(buffer, tmp)
+            tmp.flush()
+            output = subprocess.run(["antiword", tmp.name], capture_output=True, text=True, check=True).stdout
+        return [page for page in output.split("\f") if page.strip()] or [""]
+    raise ValueError("Legacy .doc files need antiword installed on the AI server; please upload PDF or DOCX")
+
+
+class ExtractionCache:
+    """LRU of extracted page texts keyed by the file's sha256."""
+
+    def __init__(self, max_entries=EXTRACT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_hash):
+        with self._lock:
+            pages = self._entries.get(file_hash)
+            if pages is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file_hash)
+            self.hits += 1
+            return pages
+
+    def put(self, file_hash, pages):
+        with self._lock:
+            self._entries[file_hash] = pages
+            self._entries.move_to_end(file_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+extraction_cache = ExtractionCache()
+
+_EXTRACTORS = {".pdf": extract_pdf, ".docx": extract_docx, ".doc": extract_doc}
+
+
+def extract_pages(cv) -> List[Document]:
+    """Extract a CV (CVDocument or path) into one Document per page, reusing earlier extractions of identical files."""
+    cv = as_cv_document(cv)
+    if cv.extension not in _EXTRACTORS:
+        raise ValueError(f"Unsupported file type: {cv.extension}")
+
+    texts = extraction_cache.get(cv.sha256)
+    if texts is None:
+        with metrics.stage_timer(f"extract_{cv.extension.lstrip('.')}"):
+            texts = _EXTRACTORS[cv.extension](cv)
+        extraction_cache.put(cv.sha256, texts)
+
+    return [
+        Document(page_content=text, metadata={"source": cv.filename, "page": index})
+        for index, text in enumerate(texts)
+    ]
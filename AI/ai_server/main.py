@@ -1,18 +1,343 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Optional
+from pydantic import BaseModel, Field
+import asyncio
+import json
 import os
-import shutil
-from rag import analyze_cv
+import logging
+import time
+from rag import (aanalyze_cv, astream_evaluation, aprepare_cv, aembed_job_description, aevaluate_prepared_cv,
+                 aindex_candidate_cv, asearch_candidates, amatch_candidates, error_result)
+from registry import registry, DEFAULT_LLM_MODEL, LLM_MODELS, check_model, UnknownModelError
+from result_cache import get_result_cache, hash_jd
+from cv_document import CVDocument
+from prescreen import parse_skills, PRESCREEN_MODES
+from streaming import sse_event
+from embedding_cache import get_embedding_cache
+from extraction import extraction_cache
+from candidate_index import get_candidate_index, IndexModelMismatch
+import metrics
+from scheduler import scheduler_stats
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-@app.post("/api/evaluate/")
-async def analyze(cv: UploadFile = File(...), jd: str = Form(...)):
-    temp_path = f"temp_{cv.filename}"
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(cv.file, buffer)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry.warm(LLM_MODELS)
+    logger.info(f"Warmed models: {', '.join(LLM_MODELS)}")
+    yield
+    await registry.aclose()
+
+# Upper bound on CV x JD pairs accepted by a single batch request
+MAX_BATCH_PAIRS = int(os.getenv("MAX_BATCH_PAIRS", "200"))
+
+# Add a Server-Timing header with per-stage durations to every JSON response
+TIMING_HEADERS = os.getenv("TIMING_HEADERS", "false").lower() in ("1", "true", "yes")
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """Count requests and unhandled errors, and report the request's stage timings when enabled."""
+    stages = metrics.start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        metrics.increment("http_errors", type=type(e).__name__)
+        raise
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.increment("http_requests", method=request.method, path=path, status=response.status_code)
+    if TIMING_HEADERS and response.headers.get("content-type", "").startswith("application/json"):
+        timings = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items()]
+        response.headers["Server-Timing"] = ", ".join(timings + [f"total;dur={elapsed * 1000:.1f}"])
+    return response
 
-    result = analyze_cv(temp_path, jd)
+async def read_upload(upload: UploadFile) -> CVDocument:
+    """Copy an upload into a CVDocument that outlives the request's form files.
 
-    os.remove(temp_path)
+    Typical CVs stay in memory; only uploads above IN_MEMORY_UPLOAD_LIMIT spill to an
+    anonymous temp file, so nothing is written under a (possibly colliding) filename.
+    """
+    await upload.seek(0)
+    return await asyncio.to_thread(CVDocument.from_fileobj, upload.file, upload.filename)
+
+def validate_model(model: str):
+    """Only the configured models (LLM_MODELS) may be requested; each one holds clients and a scheduler."""
+    try:
+        check_model(model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/evaluate/")
+async def analyze(
+    cv: UploadFile = File(...),
+    jd: str = Form(...),
+    model: str = Form(DEFAULT_LLM_MODEL),
+    use_cache: bool = Form(True),
+    skills: Optional[str] = Form(None),
+    education: Optional[str] = Form(None),
+    prescreen: str = Form("report")
+):
+    validate_model(model)
+    if prescreen not in PRESCREEN_MODES:
+        raise HTTPException(status_code=400, detail=f"prescreen must be one of: {', '.join(PRESCREEN_MODES)}")
+    # The request's own upload buffer is still open for the duration of this handler
+    document = CVDocument(cv.filename, cv.file)
+    result = await aanalyze_cv(
+        document, jd, model_name=model, use_cache=use_cache,
+        skills=parse_skills(skills), prescreen_mode=prescreen, education=education
+    )
     return JSONResponse(content=result)
+
+@app.post("/api/evaluate/stream")
+async def analyze_stream(
+    cv: UploadFile = File(...),
+    jd: str = Form(...),
+    model: str = Form(DEFAULT_LLM_MODEL),
+    use_cache: bool = Form(True),
+    skills: Optional[str] = Form(None),
+    education: Optional[str] = Form(None),
+    prescreen: str = Form("report")
+):
+    """Server-sent events variant of /api/evaluate/.
+
+    Emits one event per field (named after the field, e.g. candidate_name, eligibility,
+    ats_score) as soon as the model has produced it, then a final "result" event carrying
+    the complete, validated result.
+    """
+    validate_model(model)
+    if prescreen not in PRESCREEN_MODES:
+        raise HTTPException(status_code=400, detail=f"prescreen must be one of: {', '.join(PRESCREEN_MODES)}")
+    document = await read_upload(cv)
+
+    async def stream_events():
+        try:
+            async for kind, name, value in astream_evaluation(
+                document, jd, model_name=model, use_cache=use_cache,
+                skills=parse_skills(skills), prescreen_mode=prescreen, education=education
+            ):
+                yield sse_event(name if kind == "field" else kind, value)
+        finally:
+            document.close()
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/evaluate/batch")
+async def analyze_batch(
+    cvs: List[UploadFile] = File(...),
+    jds: List[str] = Form(...),
+    model: str = Form(DEFAULT_LLM_MODEL),
+    use_cache: bool = Form(True)
+):
+    """Score every uploaded CV against every job description, streaming NDJSON lines as pairs finish.
+
+    Each CV is parsed (and, if too long to send whole, embedded) once and each JD is embedded at
+    most once, however many pairs they take part in; only the LLM call is made per pair.
+    """
+    validate_model(model)
+    if len(cvs) * len(jds) > MAX_BATCH_PAIRS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(cvs) * len(jds)} pairs requested, limit is {MAX_BATCH_PAIRS}"
+        )
+
+    # Copy uploads before returning: the form files are closed once the handler returns
+    documents = [await read_upload(cv) for cv in cvs]
+    filenames = [document.filename for document in documents]
+
+    cv_hashes = [await asyncio.to_thread(lambda document=document: document.sha256) for document in documents]
+    jd_hashes = [hash_jd(jd) for jd in jds]
+    result_cache = get_result_cache()
+
+    # CV preparation and JD embedding start on first demand, so cached pairs and
+    # full-context CVs never pay for them
+    prepare_tasks = {}
+    jd_tasks = {}
+
+    def prepare_task(cv_index):
+        if cv_index not in prepare_tasks:
+            prepare_tasks[cv_index] = asyncio.ensure_future(aprepare_cv(documents[cv_index]))
+        return prepare_tasks[cv_index]
+
+    def jd_task(jd_index):
+        if jd_index not in jd_tasks:
+            jd_tasks[jd_index] = asyncio.ensure_future(aembed_job_description(jds[jd_index]))
+        return jd_tasks[jd_index]
+
+    async def evaluate_pair(cv_index, jd_index):
+        line = {"cv_index": cv_index, "cv_filename": filenames[cv_index], "jd_index": jd_index, "cached": False}
+        try:
+            result = await result_cache.aget(cv_hashes[cv_index], jd_hashes[jd_index], model) if use_cache else None
+            if result is not None:
+                line["cached"] = True
+            else:
+                prepared = await prepare_task(cv_index)
+                jd_vector = await jd_task(jd_index) if prepared.needs_query_vector else None
+                result = await aevaluate_prepared_cv(prepared, jds[jd_index], jd_vector, model)
+                await result_cache.aput(cv_hashes[cv_index], jd_hashes[jd_index], model, result)
+        except Exception as e:
+            result = error_result(e)
+        line["result"] = result
+        return line
+
+    async def stream_results():
+        pair_tasks = [
+            asyncio.ensure_future(evaluate_pair(cv_index, jd_index))
+            for cv_index in range(len(documents))
+            for jd_index in range(len(jds))
+        ]
+        try:
+            for next_done in asyncio.as_completed(pair_tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            background = pair_tasks + list(prepare_tasks.values()) + list(jd_tasks.values())
+            for task in background:
+                task.cancel()
+            # Let cancelled tasks observe their cancellation before their buffers are closed
+            await asyncio.gather(*background, return_exceptions=True)
+            for document in documents:
+                document.close()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.post("/api/index/{job_role_id}/candidates")
+async def index_candidate(
+    job_role_id: str,
+    cv: UploadFile = File(...),
+    candidate_id: str = Form(...)
+):
+    """Add (or re-index) a candidate's CV in the job role's semantic search index."""
+    document = CVDocument(cv.filename, cv.file)
+    try:
+        chunks = await aindex_candidate_cv(document, job_role_id, candidate_id)
+    except IndexModelMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_role_id": job_role_id, "candidate_id": candidate_id, "chunks": chunks}
+
+@app.get("/api/index/{job_role_id}/search")
+async def search_index(
+    job_role_id: str,
+    q: str = Query(..., min_length=1),
+    k: int = Query(10, ge=1, le=100)
+):
+    """Candidates for a job role ranked by how closely their best CV chunk matches the query."""
+    try:
+        results = await asearch_candidates(job_role_id, q, k)
+    except IndexModelMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_role_id": job_role_id, "results": results}
+
+class MatchRequest(BaseModel):
+    job_role_ids: List[str] = Field(..., min_length=1)
+    description: str = Field(..., min_length=1)
+    skills: List[str] = []
+    k: int = Field(20, ge=1, le=500)
+
+@app.post("/api/match")
+async def match_candidates(request: MatchRequest):
+    """Shortlist candidates already indexed under other job roles for a (new) role, without LLM calls."""
+    start = time.perf_counter()
+    try:
+        matched = await amatch_candidates(request.job_role_ids, request.description, request.skills, request.k)
+    except IndexModelMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    elapsed = time.perf_counter() - start
+    metrics.observe("match", elapsed)
+    return {**matched, "elapsed_ms": round(elapsed * 1000, 3)}
+
+@app.delete("/api/index/{job_role_id}/candidates/{candidate_id}")
+async def remove_indexed_candidate(job_role_id: str, candidate_id: str):
+    try:
+        removed = await asyncio.to_thread(get_candidate_index().remove, job_role_id, candidate_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"removed": removed}
+
+@app.delete("/api/index/{job_role_id}")
+async def drop_index(job_role_id: str):
+    try:
+        dropped = await asyncio.to_thread(get_candidate_index().drop, job_role_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"dropped": dropped}
+
+@app.delete("/api/cache/results")
+async def invalidate_results(
+    cv_sha256: Optional[str] = Query(None),
+    jd: Optional[str] = Query(None),
+    model: Optional[str] = Query(None),
+    all: bool = Query(False)
+):
+    """Drop cached evaluations for a CV, a job description and/or a model (or everything with all=true)."""
+    if not all and cv_sha256 is None and jd is None and model is None:
+        raise HTTPException(status_code=400, detail="Specify cv_sha256, jd or model, or pass all=true")
+    deleted = await asyncio.to_thread(
+        get_result_cache().invalidate,
+        cv_hash=cv_sha256,
+        jd_hash=hash_jd(jd) if jd is not None else None,
+        model=model
+    )
+    return {"deleted": deleted}
+
+def collected_metrics():
+    """Metrics owned by the caches, the candidate index and the LLM schedulers, read at scrape time."""
+    cache_stats = {
+        "embeddings": get_embedding_cache().stats(),
+        "results": get_result_cache().stats(),
+        "extraction": extraction_cache.stats(),
+    }
+    lookups = {}
+    hit_ratio = {}
+    for cache, cache_stat in cache_stats.items():
+        lookups[(("cache", cache), ("result", "hit"))] = cache_stat["hits"]
+        lookups[(("cache", cache), ("result", "miss"))] = cache_stat["misses"]
+        total = cache_stat["hits"] + cache_stat["misses"]
+        hit_ratio[(("cache", cache),)] = cache_stat["hits"] / total if total else 0.0
+
+    schedulers = scheduler_stats()
+    index_stats = get_candidate_index().stats()
+    return [
+        ("cache_lookups_total", "counter", "Cache lookups by cache and outcome.", lookups),
+        ("cache_hit_ratio", "gauge", "Fraction of cache lookups that hit since start.", hit_ratio),
+        ("llm_queue_depth", "gauge", "LLM calls waiting for quota or a concurrency slot.",
+         {(("model", model),): stats["queued"] for model, stats in schedulers.items()}),
+        ("llm_running", "gauge", "LLM calls in flight.",
+         {(("model", model),): stats["running"] for model, stats in schedulers.items()}),
+        ("candidate_index_chunks", "gauge", "CV chunks in loaded candidate indexes.", {(): index_stats["chunks"]}),
+    ]
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of stage histograms, counters, cache and queue metrics."""
+    return PlainTextResponse(
+        metrics.prometheus_text(collected_metrics()), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/api/stats")
+async def stats():
+    """Stage timings, counters and cache statistics for this server process."""
+    return {
+        **metrics.snapshot(),
+        "caches": {
+            "embeddings": get_embedding_cache().stats(),
+            "results": get_result_cache().stats(),
+            "extraction": extraction_cache.stats(),
+        },
+        "candidate_index": get_candidate_index().stats(),
+        "llm_scheduler": scheduler_stats(),
+    }
@@ -0,0 +1,159 @@
+"""In-process timing and counter registry for the AI server, exported as JSON (/api/stats) and in
+the Prometheus text format (/metrics).
+
+Stage timings recorded while serving a request are also collected per request, so the server can
+report them back in a Server-Timing header.
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = "cv_align"
+
+# Histogram bucket upper bounds in seconds, from cache hits up to slow LLM round trips
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class StageStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(STAGE_BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "avg_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+        }
+
+
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+
+# Stage timings of the request being served, started by the HTTP middleware
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def observe(stage, seconds):
+    with _lock:
+        _stages.setdefault(stage, StageStats()).observe(seconds)
+    request_stages = _request_stages.get()
+    if request_stages is not None:
+        request_stages[stage] = request_stages.get(stage, 0.0) + seconds
+
+
+def increment(counter, amount=1, **labels):
+    key = (counter, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time the enclosed block and record it under the given stage name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def start_request():
+    """Begin collecting stage timings for the current request; returns the dict they accumulate in."""
+    stages = {}
+    _request_stages.set(stages)
+    return stages
+
+
+def bind(fn):
+    """Wrap fn to run in a copy of the current context, so stages timed on an executor thread are
+    still attributed to the request that submitted them."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def _counter_name(counter, labels):
+    if not labels:
+        return counter
+    return counter + "{" + ",".join(f"{key}={value}" for key, value in labels) + "}"
+
+
+def snapshot():
+    with _lock:
+        return {
+            "stages": {stage: stats.as_dict() for stage, stats in _stages.items()},
+            "counters": {_counter_name(counter, labels): value for (counter, labels), value in _counters.items()},
+        }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value):
+    if value is None:
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text(collected=()):
+    """All stages as histograms and counters as *_total, plus metrics collected at scrape time.
+
+    collected is a sequence of (name, type, help, {label pairs tuple: value}), for values owned by
+    other components such as cache hit counts and queue depths.
+    """
+    lines = []
+    with _lock:
+        stages = {stage: (stats.count, stats.total, list(stats.buckets)) for stage, stats in _stages.items()}
+        counters = dict(_counters)
+
+    name = f"{METRIC_PREFIX}_stage_duration_seconds"
+    lines += [f"# HELP {name} Time spent in each pipeline stage.", f"# TYPE {name} histogram"]
+    for stage, (count, total, buckets) in sorted(stages.items()):
+        cumulative = 0
+        for bound, bucket in zip(STAGE_BUCKETS, buckets):
+            cumulative += bucket
+            lines.append(f'{name}_bucket{{stage="{_escape(stage)}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{stage="{_escape(stage)}",le="+Inf"}} {count}')
+        lines.append(f'{name}_sum{{stage="{_escape(stage)}"}} {total!r}')
+        lines.append(f'{name}_count{{stage="{_escape(stage)}"}} {count}')
+
+    by_name = {}
+    for (counter, labels), value in counters.items():
+        by_name.setdefault(counter, []).append((labels, value))
+    for counter, series in sorted(by_name.items()):
+        name = f"{METRIC_PREFIX}_{counter}_total"
+        lines += [f"# HELP {name} Count of {counter.replace('_', ' ')}.", f"# TYPE {name} counter"]
+        lines += [f"{name}{_labels_text(labels)} {_number(value)}" for labels, value in sorted(series)]
+
+    for metric, kind, help_text, series in collected:
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{_labels_text(labels)} {_number(value)}" for labels, value in series.items()]
+    return "\n".join(lines) + "\n"
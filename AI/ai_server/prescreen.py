@@ -0,0 +1,276 @@
+"""Deterministic skill and education pre-screen run on the CV text before the LLM is called.
+
+Skills from the job role are expanded with known synonyms, folded for case and punctuation,
+and matched against the CV in a single pass with an Aho-Corasick automaton. The role's education
+requirement is reduced to a degree level and compared with the highest level the CV mentions.
+"""
+import os
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Fraction of required skills that must be found for a CV to pass the pre-screen
+PRESCREEN_MIN_COVERAGE = float(os.getenv("PRESCREEN_MIN_COVERAGE", "0.5"))
+
+PRESCREEN_MODES = ("off", "report", "enforce")
+
+# Each group lists interchangeable spellings; the first entry is only used for readability.
+# Aliases must not be ordinary English words ("go", "rest", "express", "excel", "ai", ...): they
+# would match nearly every CV. A skill's own spelling always matches, so a role that lists "Go" or
+# "React" still finds it; only the extra spellings are restricted.
+SYNONYM_GROUPS = [
+    ["javascript", "js", "ecmascript", "es6"],
+    ["typescript", "ts"],
+    ["react js", "reactjs", "react.js"],
+    ["node js", "nodejs", "node.js"],
+    ["vue", "vue js", "vuejs", "vue.js"],
+    ["angular", "angularjs", "angular js"],
+    ["next js", "nextjs", "next.js"],
+    ["express js", "expressjs", "express.js"],
+    ["python", "python3", "py"],
+    ["golang", "go lang"],
+    ["c++", "cpp"],
+    ["c#", "csharp", "c sharp"],
+    ["dotnet", "net core", "asp.net"],
+    ["postgresql", "postgres", "psql"],
+    ["mongodb", "mongo"],
+    ["mysql", "my sql"],
+    ["sql", "structured query language"],
+    ["nosql", "no sql"],
+    ["kubernetes", "k8s"],
+    ["docker", "dockerfile", "docker compose"],
+    ["aws", "amazon web services"],
+    ["gcp", "google cloud", "google cloud platform"],
+    ["azure", "microsoft azure"],
+    ["ci/cd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    ["machine learning", "ml"],
+    ["deep learning"],
+    ["artificial intelligence"],
+    ["natural language processing", "nlp"],
+    ["computer vision", "opencv"],
+    ["large language models", "llm", "llms"],
+    ["mlops", "ml ops"],
+    ["tensorflow"],
+    ["pytorch"],
+    ["scikit-learn", "sklearn", "scikit learn"],
+    ["data structures and algorithms", "dsa", "data structures & algorithms"],
+    ["object oriented programming", "oop", "object oriented"],
+    ["rest api", "rest apis", "restful", "restful api"],
+    ["graphql", "graph ql"],
+    ["html", "html5"],
+    ["css", "css3"],
+    ["tailwind", "tailwind css", "tailwindcss"],
+    ["git", "github", "gitlab"],
+    ["linux", "unix"],
+    ["microsoft excel", "ms excel"],
+    ["power bi", "powerbi"],
+]
+
+
+# Degree levels, lowest first, with the spellings (after normalize_text) that indicate each.
+# Bare "master" (Scrum Master, master data) and two-letter forms like "m a" or "b s" (initials such
+# as M. A. Khan, M/s) are left out: normalize_text drops the dots that would tell them apart.
+EDUCATION_LEVELS = [
+    ("diploma", ["diploma", "associate degree"]),
+    ("bachelor", ["bachelor", "bachelors", "undergraduate", "b tech", "btech", "b sc", "bsc", "b eng",
+                  "beng", "bca", "b com", "bcom", "graduate degree"]),
+    ("master", ["masters", "master s", "master of", "master degree", "postgraduate", "post graduate",
+                "m tech", "mtech", "m sc", "msc", "m eng", "meng", "mca", "mba"]),
+    ("doctorate", ["phd", "ph d", "doctorate", "doctoral"]),
+]
+
+
+def normalize_text(text: str) -> str:
+    """Casefold, Unicode-normalise and replace punctuation (except + and #) with single spaces.
+
+    The result is padded with a space on both sides so that patterns normalised the same way
+    only ever match on word boundaries.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"[^\w+#]+", " ", text).strip()
+    return f" {text} "
+
+
+def _compact(alias: str) -> str:
+    """'react js' and 'reactjs' should find the same synonym group."""
+    return f" {alias.replace(' ', '')} "
+
+
+def _alias_groups() -> Dict[str, List[str]]:
+    groups = {}
+    for group in SYNONYM_GROUPS:
+        aliases = sorted({normalize_text(alias) for alias in group})
+        for alias in aliases:
+            groups[alias] = aliases
+            groups[_compact(alias)] = aliases
+    return groups
+
+
+ALIAS_GROUPS = _alias_groups()
+
+
+def expand_skill(skill: str) -> List[str]:
+    """All normalised spellings that count as evidence for a skill."""
+    normalized = normalize_text(skill)
+    aliases = {normalized}
+    aliases.update(ALIAS_GROUPS.get(normalized, []))
+    aliases.update(ALIAS_GROUPS.get(_compact(normalized), []))
+    return sorted(alias for alias in aliases if alias.strip())
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: every occurrence of every pattern found in one scan of the text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(dict.fromkeys(patterns))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                # Children of the root always fail back to the root
+                if state:
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def finditer(self, text: str):
+        """Yield (start, end, pattern) for each match, in order of end position."""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for pattern_id in self._out[state]:
+                pattern = self.patterns[pattern_id]
+                yield index + 1 - len(pattern), index + 1, pattern
+
+
+class SkillMatcher:
+    """Compiled matcher for one job role's skill list."""
+
+    def __init__(self, skills: Iterable[str]):
+        self.skills = [skill.strip() for skill in skills if skill and skill.strip()]
+        self._skills_by_alias = {}
+        for skill in self.skills:
+            for alias in expand_skill(skill):
+                self._skills_by_alias.setdefault(alias, []).append(skill)
+        self._automaton = AhoCorasick(self._skills_by_alias)
+
+    def match(self, text: str, max_evidence: int = 3, window: int = 40) -> Dict[str, List[str]]:
+        """Map each skill found in the text to up to max_evidence surrounding snippets."""
+        normalized = normalize_text(text)
+        evidence = {}
+        for start, end, alias in self._automaton.finditer(normalized):
+            snippet = normalized[max(0, start - window):end + window].strip()
+            for skill in self._skills_by_alias[alias]:
+                hits = evidence.setdefault(skill, [])
+                if len(hits) < max_evidence and snippet not in hits:
+                    hits.append(snippet)
+        return evidence
+
+
+class EducationMatcher:
+    """Finds the degree levels a text mentions, as indexes into EDUCATION_LEVELS."""
+
+    def __init__(self):
+        self._levels = {}
+        for level, (_, aliases) in enumerate(EDUCATION_LEVELS):
+            for alias in aliases:
+                self._levels[normalize_text(alias)] = level
+        self._automaton = AhoCorasick(self._levels)
+
+    def levels(self, text: str) -> List[int]:
+        return sorted({self._levels[alias] for _, _, alias in self._automaton.finditer(normalize_text(text))})
+
+
+EDUCATION_MATCHER = EducationMatcher()
+
+
+def check_education(cv_text: str, requirement: Optional[str]) -> Optional[dict]:
+    """Compare the highest degree the CV mentions with the lowest one the requirement accepts.
+
+    None when the requirement names no recognisable degree level, which leaves it to the LLM.
+    """
+    required = EDUCATION_MATCHER.levels(requirement or "")
+    if not required:
+        return None
+    found = EDUCATION_MATCHER.levels(cv_text)
+    return {
+        "required": EDUCATION_LEVELS[required[0]][0],
+        "found": EDUCATION_LEVELS[found[-1]][0] if found else None,
+        "met": bool(found) and found[-1] >= required[0],
+    }
+
+
+def parse_skills(skills) -> List[str]:
+    """Accept a list of skills or a comma-separated string, as stored on job roles."""
+    if not skills:
+        return []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return [skill.strip() for skill in skills if skill and skill.strip()]
+
+
+def prescreen_cv(cv_text: str, skills, education: Optional[str] = None,
+                 min_coverage: float = PRESCREEN_MIN_COVERAGE) -> dict:
+    """Check which required skills the CV mentions, whether it clears min_coverage, and whether
+    it shows the degree level the role's education requirement asks for."""
+    skills = parse_skills(skills)
+    education_check = check_education(cv_text, education)
+    education_met = education_check is None or education_check["met"]
+    if not skills:
+        return {"eligible": education_met, "coverage": 1.0, "matched": {}, "missing": [], "education": education_check}
+    evidence = SkillMatcher(skills).match(cv_text)
+    missing = [skill for skill in skills if skill not in evidence]
+    coverage = round((len(skills) - len(missing)) / len(skills), 4)
+    return {
+        "eligible": coverage >= min_coverage and education_met,
+        "coverage": coverage,
+        "matched": evidence,
+        "missing": missing,
+        "education": education_check,
+    }
+
+
+def guess_candidate_name(cv_text: str) -> str:
+    """First non-empty line of the CV, which is the name on nearly every CV header."""
+    for line in cv_text.splitlines():
+        line = line.strip()
+        if line:
+            return line[:80]
+    return "Not specified"
+
+
+def not_eligible_result(cv_text: str, screen: dict) -> dict:
+    """Result in the same shape parse_output returns for ineligible candidates."""
+    reasons = []
+    if screen["coverage"] < PRESCREEN_MIN_COVERAGE:
+        reasons.append(f"Missing required skills: {', '.join(screen['missing'])}")
+    education = screen.get("education")
+    if education and not education["met"]:
+        reasons.append(f"No {education['required']} degree or higher found (required: {education['required']})")
+    return {
+        "candidate_name": guess_candidate_name(cv_text),
+        "eligibility": "not_eligible",
+        "reason": "; ".join(reasons),
+        "ats_score": 0,
+        "prescreen": screen,
+    }
@@ -1,22 +1,21 @@
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_community.llms import Ollama
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains import create_retrieval_chain
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.prompts import ChatPromptTemplate
-import streamlit as st
+from registry import registry, DEFAULT_LLM_MODEL
+from result_cache import get_result_cache, hash_jd
+from cv_document import as_cv_document
+from prescreen import prescreen_cv, not_eligible_result, PRESCREEN_MODES
+from prompts import OUTPUT_MODE, REPAIR_PROMPT
+from structured_output import parse_json_output
+from extraction import extract_pages
+from scheduler import get_scheduler
+import metrics
 import os
 from dotenv import load_dotenv
 import argparse
+import asyncio
 import json
 import re
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,173 +26,425 @@ load_dotenv()
 
 # os.environ["LANGCHAIN_TRACING_V2"]="true"
 # os.environ["LANGCHAIN_API_KEY"]=os.getenv("LANGCHAIN_API_KEY")
-os.environ["GROQ_API_KEY"]=os.getenv("GROQ_API_KEY")
-os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
+# Only needed by the hosted backends; offline runs (LLM_BACKEND=local) have no keys
+for key in ("GROQ_API_KEY", "GOOGLE_API_KEY"):
+    if os.getenv(key):
+        os.environ[key] = os.getenv(key)
 
-def analyze_cv(cv_path, job_description):
-    """Analyze a CV against a job description using AI."""
-    try:
-        # Get file extension
-        file_ext = os.path.splitext(cv_path)[1].lower()
-        
-        # Load and split the CV based on file type
-        if file_ext == '.pdf':
-            loader = PyPDFLoader(cv_path)
-        elif file_ext in ['.doc', '.docx']:
-            # For DOC/DOCX files, we'll need to convert to text first
-            # You might want to add a proper DOC/DOCX loader here
-            raise NotImplementedError("DOC/DOCX parsing not implemented yet")
-        else:
-            raise ValueError(f"Unsupported file type: {file_ext}")
-            
-        docs = loader.load()
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        documents = text_splitter.split_documents(docs)
-
-        # Set up embeddings and vector store
-        embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        db = FAISS.from_documents(documents, embedding_model)
-
-        # Set up the LLM
-        llm = ChatGroq(
-            api_key=os.getenv("GROQ_API_KEY"),
-            model_name="gemma2-9b-it"
+# PDF parsing runs on its own thread pool; LLM concurrency and quotas are handled by scheduler.py
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "4"))
+
+parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="cv-parse")
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# The text splitter, FAISS and the candidate index (numpy) are imported on first use,
+# so the CLI and the servers that import this module start quickly (see benchmark.py --import-time)
+_text_splitter = None
+
+def get_text_splitter():
+    global _text_splitter
+    if _text_splitter is None:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        _text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return _text_splitter
+
+# CVs whose estimated size fits this many tokens are sent to the LLM whole, skipping embedding
+# and FAISS entirely; longer ones fall back to retrieving RETRIEVAL_K chunks.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
+
+# Token costs charged against the per-minute quota before the real usage is known
+PROMPT_OVERHEAD_TOKENS = int(os.getenv("PROMPT_OVERHEAD_TOKENS", "700"))
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "800"))
+
+FULL_CONTEXT_MODE = "full_context"
+RETRIEVAL_MODE = "retrieval"
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+def load_cv_pages(cv):
+    """Load a CV (PDF, DOCX or DOC; in-memory CVDocument or path) into one document per page."""
+    with metrics.stage_timer("load"):
+        return extract_pages(cv)
+
+class PreparedCV:
+    """A CV ready for evaluation: its full text when it fits the budget, otherwise a FAISS index over its chunks."""
+
+    def __init__(self, mode, documents, db=None):
+        self.mode = mode
+        self.documents = documents
+        self.db = db
+
+    @property
+    def needs_query_vector(self):
+        return self.mode == RETRIEVAL_MODE
+
+    def context_for(self, jd_vector=None):
+        if self.mode == FULL_CONTEXT_MODE:
+            return self.documents
+        with metrics.stage_timer("retrieve"):
+            return self.db.similarity_search_by_vector(jd_vector, k=RETRIEVAL_K)
+
+def estimate_call_tokens(documents, job_description):
+    """Estimated prompt plus completion tokens of one evaluation call."""
+    prompt = sum(estimate_tokens(document.page_content) for document in documents) + estimate_tokens(job_description)
+    return prompt + PROMPT_OVERHEAD_TOKENS + LLM_OUTPUT_TOKEN_ESTIMATE
+
+def evaluation_key(model_name, documents, job_description):
+    """Identity of an evaluation call, so concurrent identical calls reach the LLM only once."""
+    digest = hashlib.sha256(f"{model_name}\0{OUTPUT_MODE}\0{job_description}".encode("utf-8"))
+    for document in documents:
+        digest.update(b"\0" + document.page_content.encode("utf-8"))
+    return digest.hexdigest()
+
+def choose_mode(pages):
+    tokens = sum(estimate_tokens(page.page_content) for page in pages)
+    return FULL_CONTEXT_MODE if tokens <= CONTEXT_TOKEN_BUDGET else RETRIEVAL_MODE
+
+def cv_text(pages):
+    return "\n".join(page.page_content for page in pages)
+
+def prescreen_active(skills, education, prescreen_mode):
+    return bool(skills or education) and prescreen_mode != "off"
+
+def run_prescreen(pages, skills, prescreen_mode, education=None):
+    """Local skill and education check; returns (report, short-circuit result or None)."""
+    if not prescreen_active(skills, education, prescreen_mode):
+        return None, None
+    text = cv_text(pages)
+    screen = prescreen_cv(text, skills, education)
+    if prescreen_mode == "enforce" and not screen["eligible"]:
+        logger.info(f"Pre-screen rejected CV, missing skills: {screen['missing']}, education: {screen['education']}")
+        return screen, not_eligible_result(text, screen)
+    return screen, None
+
+def with_prescreen(result, screen):
+    """Attach the pre-screen report; it is never part of the cached result."""
+    if screen:
+        result["prescreen"] = screen
+    return result
+
+def split_pages(pages):
+    with metrics.stage_timer("split"):
+        return get_text_splitter().split_documents(pages)
+
+def build_index(documents, vectors):
+    """FAISS index over already-embedded chunks."""
+    from langchain_community.vectorstores import FAISS
+    with metrics.stage_timer("index"):
+        return FAISS.from_embeddings(
+            [(document.page_content, vector) for document, vector in zip(documents, vectors)],
+            registry.get_embeddings(),
+            metadatas=[document.metadata for document in documents]
         )
 
-        prompt = ChatPromptTemplate.from_template("""
-        You are an experienced HR and recruitment assistant tasked with evaluating a candidate's CV against a provided job description to determine their eligibility and suitability for the role. Your analysis must be fair, objective, and based solely on the CV and job description.
-                                                
-        **Task**:
-        1. Extract the **applicant’s name**, **CGPA/percentage in college**, **degree**, and **course/major** from the CV’s education section.
-        2. Check the **eligibility criteria** explicitly stated in the job description (e.g., required experience, specific skills, education, certifications).
-        - If the candidate does not meet *any* eligibility criterion, return only:  
-            ```
-            **Applicant Name**: [Name]
-            **Eligibility**: Candidate is not eligible.  
-            **Reason**: [Specify which criterion is not met].
-            ```
-        - If all eligibility criteria are met, proceed with the full evaluation.
-        3. For eligible candidates, provide:
-        - A **score out of 100** for suitability.
-        - **Two strengths**, each in one concise sentence (minimal words).
-        - **Two weaknesses**, each in one concise sentence (minimal words).
-        - A **feedback paragraph** (three lines, 2'3 concise sentences) for recruiters, stating if the candidate is eligible and suitable for the role.
-
-                **Scoring Criteria** (total 100%):
-                - **Skill Match (30%)**: Align technical/soft skills with job requirements.
-                - **Relevant Experience (25%)**: Assess professional, internship, or project experience.
-                - **Education (10%)**: Check relevant degrees or academic performance.
-                - **Certifications or Courses (5%)**: Verify relevant certifications/coursework.
-                - **Soft Skills (10%)**: Evaluate implied/explicit soft skills (e.g., teamwork).
-                - **Projects and Achievements (10%)**: Assess relevant projects/awards.
-                - **Formatting & Professionalism (5%)**: Evaluate CV clarity and presentation.
-                - **Customization to Job Role (5%)**: Check tailoring to job requirements.
-
-                **Instructions**:
-                - **Extraction**:
-                - Identify the applicant's name from the first few lines of the CV (likely in the header or personal details section). If not found, note as 'Not specified'.
-                - Extract CGPA or percentage from the college education entry (e.g., B.Tech, undergraduate degree). Look for patterns like 'CGPA: X', 'X (Current)', or 'X%'. If both are present, report CGPA; if none, note as 'Not specified'.
-                - Extract the degree (e.g., B.Tech, B.Sc.) from the education section, often in a table or line starting with 'B.' or 'Bachelor'. If ongoing (e.g., '2022-Present'), note the degree with 'In progress'. If not found, note as 'Not specified'.
-                - Extract the course/major (e.g., Mathematics and Computing, Computer Science) from the education section, typically after the degree (e.g., 'B.Tech - Mathematics and Computing'). If not specified, note as 'Not specified'.
-                - **Eligibility Check**:
-                - Identify all explicit eligibility criteria in the job description (e.g., specific skills like 'JavaScript/React.js,' experience level like '1'3 years,' specific degrees).
-                - Compare CV content to each criterion.
-                - If *any* criterion is not met (e.g., missing a required skill like Docker, insufficient experience), halt evaluation and return the ineligibility message.
-                - **Scoring (if eligible)**:
-                - For each criterion, assign a score (0'100%):
-                    - **Full Match**: Explicitly meets requirements (e.g., skill used in projects) → 80'100%.
-                    - **Partial Match**: Implied/limited evidence (e.g., coursework, less experience) → 40'79%.
-                    - **No Match**: No evidence → 0'39%.
-                - Calculate total score:  
-                    ```
-                    Total Score = (Skill Match x 0.3) + (Relevant Experience x 0.25) + (Education x 0.1) + (Certifications/Courses x 0.05) + (Soft Skills x 0.1) + (Projects/Achievements x 0.1) + (Formatting x 0.05) + (Customization x 0.05)
-                    ```
-                - If a criterion is not applicable (e.g., no certifications required), assign 50%.
-                - **Output**:
-                - Use only CV content in <context> tags and job description in {input}.
-                - Do not assume skills/experience not mentioned unless strongly implied.
-                - If CV or job description is incomplete, note limitations in feedback (if eligible).
-                - Strengths/weaknesses must be one sentence each, using minimal words.
-                - Feedback must be three bullet points (2-3 sentences total), stating eligibility and suitability..
-                - Detailed feedback must be 8-9 bullet points (8-9 sentences, 150-200 words) assessing eligibility, suitability, strengths, gaps, and improvement suggestions.
-                                                    
-                - **Only show those informations which are mention in the output sections below don't show anything extra**
-                - **And don't display name , course , degree and cgpa in same lines use seperate line**
-                                                    
-                **Output Format** (if eligible):
-                ```
-                **Applicant Name**: [Name]
-                                                    
-                **College CGPA/Percentage**: [CGPA or Percentage]
-                                                    
-                **Degree**: [Degree]
-                                                    
-                **Course/Major**: [Course or Major]
-                                                    
-                **ATS Score**: [Score]/100
-
-            **Strengths**:
-            - [Strength 1, one concise sentence]
-            - [Strength 2, one concise sentence but focusing on a specific thing]
-
-            **Weaknesses**:
-            - [Weakness 1, one concise sentence]
-            - [Weakness 2, one concise sentence but focusing on a specific thing]
-
-            **Feedback**:
-            - [concise Sentence on eligibility]
-            - [concise Sentence on suitability]
-            - [concise Sentence with rationale or improvement suggestion]
-
-            **Detailed Feedback**:
-            - [Sentence 1 on eligibility]
-            - [Sentence 2 on suitability]
-            - [Sentence 3 on strength 1]
-            - [Sentence 4 on strength 2]
-            - [Sentence 5 on weakness 1]
-            - [Sentence 6 on weakness 2]
-            - [Sentence 7 on additional observation, e.g., education or formatting]
-            - [Sentence 8 on improvement suggestion 1]
-            - [Sentence 9 on improvement suggestion 2]                                                                       
-            ```
-
-                **Output Format** (if not eligible):
-                ```                               
-                **Applicant Name**: [Name]
-                                                    
-                **Eligibility**: Candidate is not eligible.
-                **Reason**: [Specify unmet criterion]
-                ```
-
-                ---
-                **Candidate CV**:
-                <context>
-                {context}
-                </context>
-
-                **Job Description**:
-                {input}
-                """)
-
-        # Create and run the chain
-        document_chain = create_stuff_documents_chain(llm, prompt)
-        retriever = db.as_retriever(search_kwargs={"k": 5})
-        retrieval_chain = create_retrieval_chain(retriever, document_chain)
-
-        # Run the analysis
-        output = retrieval_chain.invoke({"input": job_description})['answer']
+def prepare_cv(pages):
+    if choose_mode(pages) == FULL_CONTEXT_MODE:
+        return PreparedCV(FULL_CONTEXT_MODE, pages)
+    documents = split_pages(pages)
+    # Chunks already embedded for this model come from the cache
+    with metrics.stage_timer("embed"):
+        vectors = registry.get_embeddings().embed_documents([document.page_content for document in documents])
+    return PreparedCV(RETRIEVAL_MODE, documents, build_index(documents, vectors))
+
+def repair_request(output, error, documents, job_description):
+    """The repair re-ask: the original evaluation prompt, the unusable reply and the correction request
+    as one conversation, so the model has the schema, the CV and its own answer to repair against."""
+    from langchain_core.messages import AIMessage, HumanMessage
+    # Rendered as the stuff chain renders it: page contents joined by blank lines
+    messages = registry.get_prompt().format_messages(
+        context="\n\n".join(document.page_content for document in documents), input=job_description
+    )
+    return messages + [AIMessage(content=output), HumanMessage(content=REPAIR_PROMPT.format(error=error))]
+
+def repair_tokens(output, documents, job_description):
+    return estimate_call_tokens(documents, job_description) + estimate_tokens(output) + PROMPT_OVERHEAD_TOKENS // 4
+
+def finish_output(output, model_name, documents, job_description):
+    """Turn the model's reply to the evaluation of documents against job_description into a result dict.
+
+    In JSON mode a malformed reply gets exactly one repair re-ask; if that also fails
+    the regex parser is tried on the original reply.
+    """
+    if OUTPUT_MODE != "json":
+        with metrics.stage_timer("parse"):
+            return parse_output(output)
+    try:
+        with metrics.stage_timer("parse"):
+            return parse_json_output(output)
+    except ValueError as e:
+        metrics.increment("json_repairs")
+        logger.warning(f"Model reply failed JSON validation, re-asking once: {e}")
+        try:
+            request = repair_request(output, e, documents, job_description)
+            repaired = get_scheduler(model_name).call_sync(
+                lambda: registry.get_llm(model_name).invoke(request), repair_tokens(output, documents, job_description)
+            ).content
+            return parse_json_output(repaired)
+        except Exception as repair_error:
+            logger.warning(f"JSON repair failed, falling back to markdown parsing: {repair_error}")
+            return parse_output(output)
+
+async def afinish_output(output, model_name, documents, job_description):
+    """Async counterpart of finish_output; the repair re-ask goes through the LLM scheduler too."""
+    if OUTPUT_MODE != "json":
+        with metrics.stage_timer("parse"):
+            return parse_output(output)
+    try:
+        with metrics.stage_timer("parse"):
+            return parse_json_output(output)
+    except ValueError as e:
+        metrics.increment("json_repairs")
+        logger.warning(f"Model reply failed JSON validation, re-asking once: {e}")
+        try:
+            request = repair_request(output, e, documents, job_description)
+            repaired = (await get_scheduler(model_name).submit(
+                lambda: registry.get_llm(model_name).ainvoke(request), repair_tokens(output, documents, job_description)
+            )).content
+            return parse_json_output(repaired)
+        except Exception as repair_error:
+            logger.warning(f"JSON repair failed, falling back to markdown parsing: {repair_error}")
+            return parse_output(output)
+
+def error_result(e):
+    logger.error(f"Error analyzing CV: {str(e)}")
+    metrics.increment("errors", type=type(e).__name__)
+    return {
+        "candidate_name": "Error analyzing CV",
+        "eligibility": "error",
+        "reason": f"Failed to analyze CV: {str(e)}",
+        "ats_score": 0
+    }
+
+def analyze_cv(cv, job_description, model_name=DEFAULT_LLM_MODEL, use_cache=True,
+               skills=None, prescreen_mode="report", education=None):
+    """Analyze a CV against a job description using AI.
+
+    When the job role's skills or education requirement are given they are checked locally first;
+    with prescreen_mode="enforce" a CV missing too many skills or the required degree level is
+    rejected without an LLM call. The check runs before the result cache is consulted, so cached
+    evaluations never bypass it.
+    """
+    try:
+        cv = as_cv_document(cv)
+        pages = load_cv_pages(cv) if prescreen_active(skills, education, prescreen_mode) else None
+        screen, rejected = run_prescreen(pages, skills, prescreen_mode, education)
+        if rejected:
+            return rejected
+
+        # Identical (CV, JD, model, prompt) evaluations are served from the result cache
+        result_cache = get_result_cache()
+        cv_hash, jd_hash = cv.sha256, hash_jd(job_description)
+        if use_cache:
+            cached = result_cache.get(cv_hash, jd_hash, model_name)
+            if cached is not None:
+                return with_prescreen(cached, screen)
+
+        if pages is None:
+            pages = load_cv_pages(cv)
+
+        prepared = prepare_cv(pages)
+        jd_vector = None
+        if prepared.needs_query_vector:
+            with metrics.stage_timer("embed"):
+                jd_vector = registry.get_embeddings().embed_query(job_description)
+
+        # Run the analysis with the long-lived chain (LLM client + prompt) for this model
+        document_chain = registry.get_document_chain(model_name)
+        context = prepared.context_for(jd_vector)
+        output = get_scheduler(model_name).call_sync(
+            lambda: document_chain.invoke({"context": context, "input": job_description}),
+            estimate_call_tokens(context, job_description)
+        )
         
-        # Parse and return the results
-        return parse_output(output)
+        # Parse, cache and return the results
+        result = finish_output(output, model_name, context, job_description)
+        result["retrieval_mode"] = prepared.mode
+        result_cache.put(cv_hash, jd_hash, model_name, result)
+        return with_prescreen(result, screen)
 
     except Exception as e:
-        logger.error(f"Error analyzing CV: {str(e)}")
-        return {
-            "candidate_name": "Error analyzing CV",
-            "eligibility": "error",
-            "reason": f"Failed to analyze CV: {str(e)}",
-            "ats_score": 0
-        }
+        return error_result(e)
+
+async def aload_cv_pages(cv):
+    """Parse a CV on the parse thread pool so the event loop stays free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(parse_executor, metrics.bind(load_cv_pages), cv)
+
+async def aprepare_cv(cv, pages=None):
+    """Parse a CV off the event loop and, for long CVs only, index it with (cached) async embeddings."""
+    if pages is None:
+        pages = await aload_cv_pages(cv)
+    if choose_mode(pages) == FULL_CONTEXT_MODE:
+        return PreparedCV(FULL_CONTEXT_MODE, pages)
+    documents = split_pages(pages)
+    with metrics.stage_timer("embed"):
+        vectors = await registry.get_embeddings().aembed_documents([document.page_content for document in documents])
+    return PreparedCV(RETRIEVAL_MODE, documents, build_index(documents, vectors))
+
+async def aindex_candidate_cv(cv, job_role_id, candidate_id):
+    """Chunk and embed a CV (through the embedding cache) into its job role's candidate index."""
+    from candidate_index import get_candidate_index
+    cv = as_cv_document(cv)
+    pages = await aload_cv_pages(cv)
+    texts = [chunk.page_content for chunk in get_text_splitter().split_documents(pages) if chunk.page_content.strip()]
+    if not texts:
+        raise ValueError("No text could be extracted from the CV")
+    embeddings = registry.get_embeddings()
+    vectors = await embeddings.aembed_documents(texts)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(parse_executor, lambda: get_candidate_index().add(
+        job_role_id, candidate_id, texts, vectors, embeddings.model_name,
+        metadata={"filename": cv.filename, "cv_sha256": cv.sha256}
+    ))
+
+async def asearch_candidates(job_role_id, query, k=10):
+    """Top-k indexed candidates for a job role by semantic similarity to a free-text query."""
+    from candidate_index import get_candidate_index
+    embeddings = registry.get_embeddings()
+    vector = await embeddings.aembed_query(query)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        parse_executor, get_candidate_index().search, job_role_id, vector, embeddings.model_name, k
+    )
+
+def role_match_queries(description, skills=None):
+    """Query texts a job role is matched on: its description and, when given, its skill list."""
+    queries = [description]
+    if skills:
+        queries.append("Skills: " + ", ".join(skills))
+    return queries
+
+async def amatch_candidates(job_role_ids, description, skills=None, k=20):
+    """Rank every candidate indexed under job_role_ids against a role without any LLM calls.
+
+    The role is embedded once per query text; scoring is one float32 matrix multiply per block of
+    indexed chunks.
+    """
+    from candidate_index import get_candidate_index
+    embeddings = registry.get_embeddings()
+    vectors = [await embeddings.aembed_query(text) for text in role_match_queries(description, skills)]
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        parse_executor, lambda: get_candidate_index().match(job_role_ids, vectors, embeddings.model_name, k)
+    )
+
+async def aembed_job_description(job_description):
+    with metrics.stage_timer("embed"):
+        return await registry.get_embeddings().aembed_query(job_description)
+
+async def aevaluate_prepared_cv(prepared, job_description, jd_vector=None, model_name=DEFAULT_LLM_MODEL):
+    """Score a prepared CV; jd_vector is only needed when the CV is in retrieval mode."""
+    context = prepared.context_for(jd_vector)
+    document_chain = registry.get_document_chain(model_name)
+    # Rate limited and retried; identical calls already in flight (e.g. the same CV uploaded twice)
+    # share one LLM round trip
+    output = await get_scheduler(model_name).submit(
+        lambda: document_chain.ainvoke({"context": context, "input": job_description}),
+        estimate_call_tokens(context, job_description),
+        key=evaluation_key(model_name, context, job_description)
+    )
+    result = await afinish_output(output, model_name, context, job_description)
+    result["retrieval_mode"] = prepared.mode
+    return result
+
+async def aanalyze_cv(cv, job_description, model_name=DEFAULT_LLM_MODEL, use_cache=True,
+                      skills=None, prescreen_mode="report", education=None):
+    """Non-blocking variant of analyze_cv for the AI server's event loop."""
+    try:
+        cv = as_cv_document(cv)
+        pages = await aload_cv_pages(cv) if prescreen_active(skills, education, prescreen_mode) else None
+        screen, rejected = run_prescreen(pages, skills, prescreen_mode, education)
+        if rejected:
+            return rejected
+
+        result_cache = get_result_cache()
+        loop = asyncio.get_running_loop()
+        cv_hash = await loop.run_in_executor(parse_executor, lambda: cv.sha256)
+        jd_hash = hash_jd(job_description)
+        if use_cache:
+            cached = await result_cache.aget(cv_hash, jd_hash, model_name)
+            if cached is not None:
+                return with_prescreen(cached, screen)
+
+        if pages is None:
+            pages = await aload_cv_pages(cv)
+
+        prepared = await aprepare_cv(cv, pages)
+        jd_vector = await aembed_job_description(job_description) if prepared.needs_query_vector else None
+        result = await aevaluate_prepared_cv(prepared, job_description, jd_vector, model_name)
+        await result_cache.aput(cv_hash, jd_hash, model_name, result)
+        return with_prescreen(result, screen)
+
+    except Exception as e:
+        return error_result(e)
+
+async def astream_evaluation(cv, job_description, model_name=DEFAULT_LLM_MODEL, use_cache=True,
+                             skills=None, prescreen_mode="report", education=None):
+    """Evaluate a CV while streaming the answer, yielding ("field", name, value) as each field completes
+    and finally ("result", None, result) with the same dict aanalyze_cv would return."""
+    try:
+        cv = as_cv_document(cv)
+        pages = await aload_cv_pages(cv) if prescreen_active(skills, education, prescreen_mode) else None
+        screen, rejected = run_prescreen(pages, skills, prescreen_mode, education)
+        if rejected:
+            yield "result", None, rejected
+            return
+
+        result_cache = get_result_cache()
+        loop = asyncio.get_running_loop()
+        cv_hash = await loop.run_in_executor(parse_executor, lambda: cv.sha256)
+        jd_hash = hash_jd(job_description)
+        cached = await result_cache.aget(cv_hash, jd_hash, model_name) if use_cache else None
+        if cached is not None:
+            cached = with_prescreen(cached, screen)
+            for name, value in cached.items():
+                yield "field", name, value
+            yield "result", None, cached
+            return
+
+        if pages is None:
+            pages = await aload_cv_pages(cv)
+
+        prepared = await aprepare_cv(cv, pages)
+        jd_vector = await aembed_job_description(job_description) if prepared.needs_query_vector else None
+        document_chain = registry.get_document_chain(model_name)
+        context = prepared.context_for(jd_vector)
+        scheduler = get_scheduler(model_name)
+        from streaming import JsonFieldStream, MarkdownFieldStream
+        fields = JsonFieldStream() if OUTPUT_MODE == "json" else MarkdownFieldStream()
+        chunks = []
+        attempt = 0
+        while True:
+            try:
+                async with scheduler.slot(estimate_call_tokens(context, job_description)):
+                    async for chunk in document_chain.astream({"context": context, "input": job_description}):
+                        chunks.append(chunk)
+                        for name, value in fields.feed(chunk):
+                            yield "field", name, value
+                break
+            except Exception as e:
+                # Fields already sent to the client cannot be taken back, so only retry before the first chunk
+                delay = scheduler.backoff_delay(e, attempt) if not chunks else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+        for name, value in fields.close():
+            yield "field", name, value
+
+        # The final result goes through the same validation/repair path as non-streamed evaluations
+        result = await afinish_output("".join(chunks), model_name, context, job_description)
+        result["retrieval_mode"] = prepared.mode
+        await result_cache.aput(cv_hash, jd_hash, model_name, result)
+        yield "result", None, with_prescreen(result, screen)
+
+    except Exception as e:
+        yield "result", None, error_result(e)
 
 def parse_output(output):
     """Parse the AI model output into a structured format."""
@@ -233,22 +484,19 @@ def parse_output(output):
             "ats_score": 0
         }
 
-st.title('CV_Align')
-input_text=st.text_input("Provide Job Description")
-
-output_parser=StrOutputParser()
-
-if input_text:
-    st.write(retrieval_chain.invoke({"input":input_text})['answer'])
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--cv", required=True, help="Path to the CV PDF file")
     parser.add_argument("--job", required=True, help="Job description text")
+    parser.add_argument("--skills", default=None, help="Comma-separated skills required by the job role")
+    parser.add_argument("--education", default=None, help="The job role's education requirement")
+    parser.add_argument("--prescreen", default="report", choices=PRESCREEN_MODES,
+                        help="Skill pre-screen: off, report evidence, or enforce (reject without an LLM call)")
     args = parser.parse_args()
 
     try:
-        result = analyze_cv(args.cv, args.job)
+        result = analyze_cv(args.cv, args.job, skills=args.skills, prescreen_mode=args.prescreen,
+                            education=args.education)
         print(json.dumps(result))
     except Exception as e:
         logger.error(f"Error in main: {str(e)}")
@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+from contextvars import ContextVar
+from typing import Optional
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+from prompts import EVALUATION_PROMPT, JSON_EVALUATION_PROMPT, OUTPUT_MODE
+import metrics
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# groq | local: the local backends are deterministic offline stand-ins (see backends.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "google")
+
+DEFAULT_LLM_MODEL = os.getenv("LLM_MODEL", "gemma2-9b-it")
+# The only models requests may name: each one gets its own long-lived clients and scheduler, so an
+# open-ended set would grow without bound. All of them are built at server startup.
+LLM_MODELS = list(dict.fromkeys(
+    [DEFAULT_LLM_MODEL] + [m.strip() for m in os.getenv("LLM_MODELS", "").split(",") if m.strip()]
+))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/embedding-001")
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+# Token usage of the LLM call the scheduler is running in this context; TokenUsageHandler adds to it
+# and the scheduler charges it to its token bucket (see LLMScheduler.settle)
+current_call_usage: ContextVar[Optional[dict]] = ContextVar("current_call_usage", default=None)
+
+
+class UnknownModelError(ValueError):
+    pass
+
+
+def check_model(model_name: str) -> str:
+    if model_name not in LLM_MODELS:
+        raise UnknownModelError(f"Unknown model {model_name!r}; use one of: {', '.join(LLM_MODELS)}")
+    return model_name
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Counts prompt and completion tokens reported by every call to one model."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        if not input_tokens and not output_tokens:
+            # Providers that only report usage in llm_output (OpenAI-style token_usage)
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens", 0)
+            output_tokens = usage.get("completion_tokens", 0)
+        metrics.increment("llm_input_tokens", input_tokens, model=self.model_name)
+        metrics.increment("llm_output_tokens", output_tokens, model=self.model_name)
+        call_usage = current_call_usage.get()
+        if call_usage is not None:
+            call_usage["total_tokens"] += input_tokens + output_tokens
+
+
+class ModelRegistry:
+    """Long-lived LLMs, embedding clients and chains, built once and shared across requests.
+
+    Every object is keyed by model name, so the server can serve several models side by side.
+    LLM_BACKEND / EMBEDDING_BACKEND swap the hosted providers for the offline stand-ins.
+    The Groq clients share one pooled httpx client per model, so the TLS connection to the
+    provider is reused between CVs instead of being re-established per request.
+
+    Provider SDKs, httpx and the local stand-ins are imported when the first client of their kind
+    is built, which keeps importing this module (and everything that imports it) cheap.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._prompts = {}
+        self._llms = {}
+        self._embeddings = {}
+        self._document_chains = {}
+        self._http_clients = []
+
+    def get_prompt(self, output_mode: str = OUTPUT_MODE):
+        with self._lock:
+            if output_mode not in self._prompts:
+                from langchain_core.prompts import ChatPromptTemplate
+                template = JSON_EVALUATION_PROMPT if output_mode == "json" else EVALUATION_PROMPT
+                self._prompts[output_mode] = ChatPromptTemplate.from_template(template)
+            return self._prompts[output_mode]
+
+    def get_llm(self, model_name: str = DEFAULT_LLM_MODEL):
+        check_model(model_name)
+        with self._lock:
+            if model_name not in self._llms and LLM_BACKEND == "local":
+                from backends import LocalEvaluatorChatModel
+                self._llms[model_name] = LocalEvaluatorChatModel(
+                    model_name=model_name, callbacks=[TokenUsageHandler(model_name)]
+                )
+                logger.info(f"Using local stand-in LLM for {model_name}")
+            elif model_name not in self._llms:
+                import httpx
+                from langchain_groq import ChatGroq
+                limits = httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                    keepalive_expiry=60.0,
+                )
+                timeout = httpx.Timeout(LLM_TIMEOUT, connect=10.0)
+                http_client = httpx.Client(limits=limits, timeout=timeout)
+                http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+                self._http_clients.extend([http_client, http_async_client])
+                self._llms[model_name] = ChatGroq(
+                    api_key=os.getenv("GROQ_API_KEY"),
+                    model_name=model_name,
+                    http_client=http_client,
+                    http_async_client=http_async_client,
+                    # The LLM scheduler is the only retry layer, so it alone honours Retry-After
+                    max_retries=0,
+                    callbacks=[TokenUsageHandler(model_name)],
+                )
+                logger.info(f"Initialised LLM client for {model_name}")
+            return self._llms[model_name]
+
+    def get_embeddings(self, model_name: str = EMBEDDING_MODEL):
+        with self._lock:
+            if model_name not in self._embeddings and EMBEDDING_BACKEND == "hashing":
+                # Hashing is cheaper than a cache lookup, so it is used uncached
+                from backends import HashingEmbeddings
+                self._embeddings[model_name] = HashingEmbeddings()
+                logger.info("Using local hashing embeddings")
+            elif model_name not in self._embeddings:
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                from embedding_cache import CachedEmbeddings
+                self._embeddings[model_name] = CachedEmbeddings(
+                    GoogleGenerativeAIEmbeddings(model=model_name),
+                    model_name=model_name
+                )
+                logger.info(f"Initialised embedding client for {model_name}")
+            return self._embeddings[model_name]
+
+    def get_document_chain(self, model_name: str = DEFAULT_LLM_MODEL, output_mode: str = OUTPUT_MODE):
+        key = (model_name, output_mode)
+        with self._lock:
+            if key not in self._document_chains:
+                from langchain.chains.combine_documents import create_stuff_documents_chain
+                self._document_chains[key] = create_stuff_documents_chain(
+                    self.get_llm(model_name), self.get_prompt(output_mode)
+                )
+            return self._document_chains[key]
+
+    def warm(self, model_names=None):
+        """Build the chains (and their clients) for the given models ahead of the first request."""
+        for model_name in model_names or [DEFAULT_LLM_MODEL]:
+            self.get_document_chain(model_name)
+        self.get_embeddings()
+
+    async def aclose(self):
+        with self._lock:
+            clients, self._http_clients = self._http_clients, []
+            self._llms.clear()
+            self._document_chains.clear()
+        for client in clients:
+            if hasattr(client, "aclose"):
+                await client.aclose()
+            else:
+                client.close()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+from prompts import CACHE_PROMPT_VERSION
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results.sqlite3")
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", DEFAULT_CACHE_PATH)
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Results from the offline stand-in LLM must never be served for the real model of the same name
+CACHE_VERSION = f"{CACHE_PROMPT_VERSION}-{os.getenv('LLM_BACKEND', 'groq')}"
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_jd(job_description: str) -> str:
+    """Canonical form of a job description so formatting-only edits still hit the cache."""
+    return " ".join(unicodedata.normalize("NFKC", job_description).split())
+
+
+def hash_jd(job_description: str) -> str:
+    return hashlib.sha256(normalize_jd(job_description).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Parsed evaluation results keyed by (CV hash, JD hash, model, prompt version), with a TTL."""
+
+    def __init__(self, path: str = RESULT_CACHE_PATH, ttl: int = RESULT_CACHE_TTL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent without an fsync per commit; a crash can only lose the latest puts
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "cv_hash TEXT NOT NULL, jd_hash TEXT NOT NULL, model TEXT NOT NULL, prompt_version TEXT NOT NULL, "
+            "result TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (cv_hash, jd_hash, model, prompt_version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_expires_at ON results(expires_at)")
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cv_hash: str, jd_hash: str, model: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM results WHERE cv_hash = ? AND jd_hash = ? AND model = ? "
+                "AND prompt_version = ? AND expires_at > ?",
+                (cv_hash, jd_hash, model, CACHE_VERSION, time.time()),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, cv_hash: str, jd_hash: str, model: str, result: dict, ttl: Optional[int] = None) -> None:
+        # Errors are transient (quota, network); never pin them in the cache
+        if result.get("eligibility") == "error":
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results "
+                "(cv_hash, jd_hash, model, prompt_version, result, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cv_hash, jd_hash, model, CACHE_VERSION, json.dumps(result), now, now + (ttl or self.ttl)),
+            )
+
+    # The async path's counterparts run the SQLite I/O on a worker thread, off the event loop
+    async def aget(self, cv_hash: str, jd_hash: str, model: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get, cv_hash, jd_hash, model)
+
+    async def aput(self, cv_hash: str, jd_hash: str, model: str, result: dict, ttl: Optional[int] = None) -> None:
+        await asyncio.to_thread(self.put, cv_hash, jd_hash, model, result, ttl)
+
+    def invalidate(self, cv_hash: Optional[str] = None, jd_hash: Optional[str] = None,
+                   model: Optional[str] = None) -> int:
+        """Delete entries matching every given filter; with no filters, clear the whole cache."""
+        clauses, params = [], []
+        for column, value in (("cv_hash", cv_hash), ("jd_hash", jd_hash), ("model", model)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM results{where}", params).rowcount
+        logger.info(f"Invalidated {deleted} cached evaluation results")
+        return deleted
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_default_cache: Optional[ResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache instance, opened on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
@@ -0,0 +1,287 @@
+"""Central LLM call scheduler: token buckets for the provider's per-minute request and token quotas,
+Retry-After aware retries with jittered exponential backoff, and coalescing of identical in-flight
+calls so a burst of uploads finishes as fast as the quota allows instead of failing with 429s.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import metrics
+from registry import LLM_BACKEND, current_call_usage
+
+logger = logging.getLogger(__name__)
+
+# Provider quotas per model (Groq's free tier defaults); 0 disables a limit. The local stand-in
+# LLM is never rate limited.
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "15000"))
+# Number of processes spending the same quotas, each with its own scheduler; each gets an equal share
+LLM_QUOTA_SHARE = max(1, int(os.getenv("LLM_QUOTA_SHARE", "1")))
+# Bound on concurrent LLM round trips per model from the async path
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations: a caller takes its tokens immediately (the level
+    may go negative) and is told how long to wait until the bucket has refilled to cover them.
+    Reservations are served in arrival order and work for both threads and coroutines."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount tokens and return the seconds to wait before using them."""
+        if not self.enabled:
+            return 0.0
+        # A single request larger than the whole bucket must still be allowed through eventually
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float):
+        """Correct an earlier reservation once the real cost is known (negative refunds)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level - amount)
+
+    def available(self) -> Optional[float]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._refill(time.monotonic())
+            return round(self.level, 1)
+
+
+def status_code_of(error) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def retry_after_of(error) -> Optional[float]:
+    """Seconds the provider asked us to wait, from the Retry-After header if present."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _connection_errors():
+    import httpx
+    errors = [httpx.TransportError]
+    try:
+        # Raised by the Groq SDK for network failures and timeouts; they carry no status code
+        import groq
+        errors += [groq.APIConnectionError, groq.APITimeoutError]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def is_retryable(error) -> bool:
+    return status_code_of(error) in RETRYABLE_STATUS_CODES or isinstance(error, _connection_errors())
+
+
+class LLMScheduler:
+    """Admission control for one model's LLM calls."""
+
+    def __init__(self, model_name: str, requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE, concurrency: int = LLM_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES):
+        self.model_name = model_name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self._concurrency = asyncio.Semaphore(concurrency)
+        self._paused_until = 0.0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.stats_counters = {"calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats_counters[name] += amount
+        metrics.increment(f"llm_{name}", amount, model=self.model_name)
+
+    def _reserve(self, estimated_tokens: float) -> float:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        return max(wait, self._paused_until - time.monotonic())
+
+    def backoff_delay(self, error, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after error on the given (0-based) attempt, or None to give up."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            # Honour the server's hint, plus jitter so queued callers do not all return at once
+            delay = retry_after + random.uniform(0, min(retry_after, LLM_BACKOFF_BASE) + 0.1)
+        else:
+            delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+        if status_code_of(error) == 429:
+            self._count("rate_limited")
+            # Everyone waiting on this model backs off, not just the caller that was refused
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._count("retries")
+        return delay
+
+    def settle(self, estimated_tokens: float, usage: dict) -> None:
+        """Charge the token bucket with the call's real usage when the provider reported it."""
+        if usage.get("total_tokens"):
+            self.tokens.adjust(usage["total_tokens"] - estimated_tokens)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: float):
+        """Wait for quota and a concurrency slot, then hold the slot for one call attempt."""
+        with self._lock:
+            self.queued += 1
+        queued_at = time.perf_counter()
+        try:
+            wait = self._reserve(estimated_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._concurrency.acquire()
+        finally:
+            with self._lock:
+                self.queued -= 1
+            metrics.observe("llm_queue", time.perf_counter() - queued_at)
+        with self._lock:
+            self.running += 1
+        # Filled in by TokenUsageHandler when the call (streamed or not) reports its usage
+        usage = {"total_tokens": 0}
+        token = current_call_usage.set(usage)
+        try:
+            with metrics.stage_timer("llm"):
+                yield
+        finally:
+            current_call_usage.reset(token)
+            self.settle(estimated_tokens, usage)
+            with self._lock:
+                self.running -= 1
+            self._concurrency.release()
+
+    async def _call_with_retries(self, estimated_tokens, call):
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(estimated_tokens):
+                    return await call()
+            except Exception as e:
+                delay = self.backoff_delay(e, attempt)
+                if delay is None:
+                    self._count("failures")
+                    raise
+                logger.warning(f"LLM call to {self.model_name} failed ({e}); retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def submit(self, call, estimated_tokens: float, key: Optional[str] = None):
+        """Run call() (a coroutine factory) under the quota with retries.
+
+        Calls submitted with the same key while one is already in flight share its result instead
+        of reaching the provider again.
+        """
+        self._count("calls")
+        if key is None:
+            return await self._call_with_retries(estimated_tokens, call)
+        future = self._inflight.get(key)
+        if future is not None:
+            self._count("coalesced")
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._call_with_retries(estimated_tokens, call))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def call_sync(self, call, estimated_tokens: float):
+        """Blocking counterpart of submit for the CLI path (no coalescing, no concurrency bound)."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            wait = self._reserve(estimated_tokens)
+            if wait > 0:
+                time.sleep(wait)
+            usage = {"total_tokens": 0}
+            token = current_call_usage.set(usage)
+            try:
+                with metrics.stage_timer("llm"):
+                    return call()
+            except Exception as e:
+                error = e
+            finally:
+                current_call_usage.reset(token)
+                self.settle(estimated_tokens, usage)
+            delay = self.backoff_delay(error, attempt)
+            if delay is None:
+                self._count("failures")
+                raise error
+            logger.warning(f"LLM call to {self.model_name} failed ({error}); retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "coalescing": len(self._inflight),
+                "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+                "requests_available": self.requests.available(),
+                "tokens_available": self.tokens.available(),
+                **self.stats_counters,
+            }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model_name: str) -> LLMScheduler:
+    """One scheduler per model, since provider quotas are per model."""
+    with _schedulers_lock:
+        if model_name not in _schedulers:
+            if LLM_BACKEND == "local":
+                _schedulers[model_name] = LLMScheduler(model_name, requests_per_minute=0, tokens_per_minute=0)
+            else:
+                _schedulers[model_name] = LLMScheduler(
+                    model_name, requests_per_minute=LLM_REQUESTS_PER_MINUTE / LLM_QUOTA_SHARE,
+                    tokens_per_minute=LLM_TOKENS_PER_MINUTE / LLM_QUOTA_SHARE
+                )
+        return _schedulers[model_name]
+
+
+def scheduler_stats() -> dict:
+    with _schedulers_lock:
+        schedulers = dict(_schedulers)
+    return {model_name: scheduler.stats() for model_name, scheduler in schedulers.items()}
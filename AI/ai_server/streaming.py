@@ -0,0 +1,126 @@
+"""Incremental field extraction for streamed model replies, and server-sent event framing.
+
+Both parsers are fed text chunks as they arrive from the model and return the
+(field, value) pairs that became complete, using the same field names as the final result.
+"""
+import json
+import re
+
+
+def sse_event(event, data):
+    """Frame one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+MARKDOWN_HEADERS = {
+    "Applicant Name": "candidate_name",
+    "Eligibility": "eligibility",
+    "Reason": "reason",
+    "College CGPA/Percentage": "cgpa",
+    "Degree": "degree",
+    "Course/Major": "course",
+    "ATS Score": "ats_score",
+    "Strengths": "strengths",
+    "Weaknesses": "weaknesses",
+    "Feedback": "feedback",
+    "Detailed Feedback": "detailed_feedback",
+}
+_HEADER_RE = re.compile(r"\*\*(" + "|".join(re.escape(header) for header in MARKDOWN_HEADERS) + r")\*\*:")
+
+
+class MarkdownFieldStream:
+    """A markdown section is complete once the next section header has started."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        return self._drain(final=False)
+
+    def close(self):
+        return self._drain(final=True)
+
+    def _drain(self, final):
+        matches = list(_HEADER_RE.finditer(self.buffer))
+        complete = len(matches) if final else len(matches) - 1
+        fields = []
+        while self.emitted < complete:
+            match = matches[self.emitted]
+            end = matches[self.emitted + 1].start() if self.emitted + 1 < len(matches) else len(self.buffer)
+            field = MARKDOWN_HEADERS[match.group(1)]
+            value = self.buffer[match.end():end].replace("```", "").strip()
+            fields.extend(self._convert(field, value))
+            self.emitted += 1
+        return fields
+
+    @staticmethod
+    def _convert(field, value):
+        if field == "eligibility":
+            return [(field, "not_eligible" if "not eligible" in value.lower() else "eligible")]
+        if field == "ats_score":
+            digits = re.search(r"\d+", value)
+            # The markdown format only has an Eligibility line for rejected candidates
+            return [("eligibility", "eligible"), (field, int(digits.group()) if digits else 0)]
+        if field in ("strengths", "weaknesses"):
+            return [(field, [line.strip()[2:].strip() for line in value.splitlines() if line.strip().startswith("- ")])]
+        if field in ("candidate_name", "reason", "cgpa", "degree", "course"):
+            return [(field, value.splitlines()[0].strip() if value else "")]
+        return [(field, value)]
+
+
+class JsonFieldStream:
+    """A top-level JSON member is complete once the following ',' or the closing '}' arrives."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        fields = []
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.key is None and self.key_start is not None:
+                        self.key = json.loads(self.buffer[self.key_start:self.pos + 1])
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.key is None:
+                    self.key_start = self.pos
+            elif char == ":" and self.depth == 1 and self.key is not None and self.value_start is None:
+                self.value_start = self.pos + 1
+            elif char == "," and self.depth == 1:
+                self._end_member(fields)
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 1:
+                    self._end_member(fields)
+                self.depth -= 1
+            self.pos += 1
+        return fields
+
+    def close(self):
+        return []
+
+    def _end_member(self, fields):
+        if self.key is not None and self.value_start is not None:
+            try:
+                fields.append((self.key, json.loads(self.buffer[self.value_start:self.pos])))
+            except json.JSONDecodeError:
+                pass
+        self.key_start = self.key = self.value_start = None
@@ -0,0 +1,46 @@
+"""Streamlit front end for trying out CV evaluations by hand.
+
+    streamlit run streamlit_app.py
+
+Kept out of rag.py so that the CLI and the API server never import Streamlit.
+"""
+import streamlit as st
+
+from cv_document import CVDocument
+from prescreen import parse_skills, PRESCREEN_MODES
+from rag import analyze_cv
+from registry import LLM_MODELS
+
+st.title("CV_Align")
+
+cv_file = st.file_uploader("Upload CV", type=["pdf", "docx", "doc"])
+job_description = st.text_area("Provide Job Description")
+skills = st.text_input("Required skills (comma-separated, optional)")
+education = st.text_input("Education requirement (optional)")
+prescreen_mode = st.selectbox("Skill and education pre-screen", PRESCREEN_MODES, index=PRESCREEN_MODES.index("report"))
+model_name = st.selectbox("Model", LLM_MODELS)
+
+if st.button("Evaluate", disabled=not (cv_file and job_description.strip())):
+    cv = CVDocument.from_bytes(cv_file.getvalue(), cv_file.name)
+    with st.spinner("Evaluating CV..."):
+        result = analyze_cv(
+            cv, job_description, model_name=model_name,
+            skills=parse_skills(skills) or None, prescreen_mode=prescreen_mode,
+            education=education.strip() or None
+        )
+
+    if result.get("eligibility") == "error":
+        st.error(result.get("reason", "Evaluation failed"))
+    else:
+        st.subheader(result.get("candidate_name") or "Candidate")
+        st.metric("ATS score", result.get("ats_score", 0))
+        if result.get("eligibility") == "not_eligible":
+            st.warning(result.get("reason", "Candidate is not eligible"))
+        for heading, field in (("Strengths", "strengths"), ("Weaknesses", "weaknesses")):
+            if result.get(field):
+                st.markdown(f"**{heading}**")
+                st.markdown("\n".join(f"- {item}" for item in result[field]))
+        if result.get("feedback"):
+            st.markdown(f"**Feedback**\n\n{result['feedback']}")
+    with st.expander("Raw result"):
+        st.json(result)
@@ -0,0 +1,73 @@
+"""Schema validation for the JSON output mode of the evaluation prompt."""
+import json
+import re
+from typing import List, Literal
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+
+class EvaluationResult(BaseModel):
+    """What the model must return in JSON mode; mirrors the AI fields of the backend's CandidateBase."""
+    candidate_name: str = "Not specified"
+    eligibility: Literal["eligible", "not_eligible"]
+    reason: str = ""
+    cgpa: str = "Not specified"
+    degree: str = "Not specified"
+    course: str = "Not specified"
+    ats_score: int = Field(default=0, ge=0, le=100)
+    strengths: List[str] = []
+    weaknesses: List[str] = []
+    feedback: str = ""
+    detailed_feedback: str = ""
+
+    @model_validator(mode="after")
+    def _eligible_results_are_scored(self):
+        # A bare {"eligibility": "eligible"} would otherwise pass as an eligible candidate scored 0
+        if self.eligibility == "eligible" and "ats_score" not in self.model_fields_set:
+            raise ValueError("eligible results need an ats_score")
+        return self
+
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def extract_json_object(output: str) -> str:
+    """Strip code fences and surrounding chatter, keeping the outermost {...} block."""
+    text = _CODE_FENCE.sub("", output.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("no JSON object found in the reply")
+    return text[start:end + 1]
+
+
+def parse_json_output(output: str) -> dict:
+    """Validate a JSON-mode reply and return it in the same shape parse_output produces.
+
+    Raises ValueError with a message suitable for a repair re-ask when the reply is malformed.
+    """
+    try:
+        result = EvaluationResult.model_validate(json.loads(extract_json_object(output)))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e.msg} at position {e.pos})")
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        raise ValueError(f"JSON does not match the schema ({problems})")
+
+    if result.eligibility == "not_eligible":
+        return {
+            "candidate_name": result.candidate_name,
+            "eligibility": "not_eligible",
+            "reason": result.reason,
+            "ats_score": 0
+        }
+    return {
+        "candidate_name": result.candidate_name,
+        "cgpa": result.cgpa,
+        "degree": result.degree,
+        "course": result.course,
+        "ats_score": result.ats_score,
+        "strengths": result.strengths,
+        "weaknesses": result.weaknesses,
+        "feedback": result.feedback.strip(),
+        "detailed_feedback": result.detailed_feedback.strip()
+    }
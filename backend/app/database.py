@@ -30,6 +30,13 @@ class Database:
             await cls.db.job_roles.create_index([("company_id", 1), ("title", 1)], unique=True)
             logging.info("Initialized job_roles collection with indexes")
         
+        # Duplicate-upload lookups by content hash within a job role; create_index is a no-op if it exists
+        await cls.db.candidates.create_index([("job_role_id", 1), ("cv_sha256", 1)])
+        # Evaluation queue: one job per candidate, claimed oldest-due first
+        await cls.db.evaluation_jobs.create_index("candidate_id", unique=True)
+        await cls.db.evaluation_jobs.create_index([("status", 1), ("available_at", 1)])
+        await cls.db.evaluation_jobs.create_index([("status", 1), ("lease_expires_at", 1)])
+
         logging.info("Connected to MongoDB successfully")
 
     @classmethod
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from app.database import connect_to_mongo, close_mongo_connection
 from app.routes import company, auth, job_role, users, candidate
+from app.utils.ai_worker import ai_worker_pool
+from app.utils.http_client import start_http_client, close_http_client
+from app.utils.evaluation_queue import evaluation_queue
+from app.utils.storage import get_storage, STORAGE_BACKEND, LOCAL_STORAGE_PATH
 from backend.app.routes import evaluate
 import logging
 
@@ -19,12 +24,22 @@ app = FastAPI(
 # --- Event Handlers ---
 @app.on_event("startup")
 async def startup():
+    # Fails start-up on a misconfigured storage backend (e.g. missing Cloudinary credentials)
+    get_storage()
     await connect_to_mongo()
+    await start_http_client()
+    # Spawn and warm the AI workers now so the first upload does not pay for it
+    await ai_worker_pool.start()
+    # Also picks up evaluations left queued or unfinished by earlier runs
+    evaluation_queue.start(candidate.process_evaluation_job, candidate.record_failed_evaluation)
     logger.info("Application startup complete")
 
 @app.on_event("shutdown")
 async def shutdown():
+    await evaluation_queue.stop()
     await close_mongo_connection()
+    await ai_worker_pool.close()
+    await close_http_client()
     logger.info("Application shutdown complete")
 
 # --- CORS Settings ---
@@ -45,6 +60,11 @@ app.include_router(users.router)
 app.include_router(candidate.router, prefix="/candidates", tags=["Candidates"])
 app.include_router(evaluate.router, prefix="/api")
 
+# --- Local CV Storage ---
+# With STORAGE_BACKEND=local the stored CVs' URLs point here (see utils/storage.py)
+if STORAGE_BACKEND == "local":
+    app.mount(LOCAL_STORAGE_PATH, StaticFiles(directory=get_storage().root), name="files")
+
 # --- Root Endpoint ---
 @app.get("/")
 def root():
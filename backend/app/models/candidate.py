@@ -13,10 +13,11 @@ class CandidateBase(BaseModel):
     feedback: Optional[str] = None
     detailed_feedback: Optional[str] = None
     cv_url: Optional[HttpUrl] = None
+    cv_sha256: Optional[str] = None
     recruiter_id: str
     job_role_id: Optional[str] = None
     job_role_title: str
-    status: str = "uploaded"  # uploaded, selected, rejected, shortlisted
+    status: str = "uploaded"  # pending, uploaded, selected, rejected, shortlisted, evaluation_failed
     created_at: Optional[datetime] = None
 
 class CandidateCreate(BaseModel):
@@ -26,4 +27,39 @@ class CandidateCreate(BaseModel):
 class CandidateResponse(CandidateBase):
     id: str
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class CandidateSearchResult(BaseModel):
+    candidate: CandidateResponse
+    score: float
+    snippet: Optional[str] = None
+
+class EvaluationStatus(BaseModel):
+    candidate_id: str
+    status: str  # queued, running, done, failed
+    attempts: int
+    max_attempts: int
+    queue_position: Optional[int] = None
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class BulkUploadItem(BaseModel):
+    filename: str
+    source: Optional[str] = None  # the ZIP archive the file came from
+    status: str  # queued, copied, duplicate, skipped, error
+    candidate_id: Optional[str] = None
+    cv_sha256: Optional[str] = None
+    detail: Optional[str] = None
+
+class BulkUploadResponse(BaseModel):
+    job_role_id: str
+    received: int
+    queued: int
+    copied: int
+    duplicates: int
+    failed: int
+    elapsed_ms: float
+    results: List[BulkUploadItem]
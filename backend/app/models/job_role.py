@@ -3,6 +3,8 @@ from pydantic import BaseModel, Field
 from typing import Optional, List
 from bson import ObjectId
 
+from app.models.candidate import CandidateSearchResult
+
 class PyObjectId(ObjectId):
     @classmethod
     def __get_validators__(cls):
@@ -98,4 +100,11 @@ class JobRoleResponse(BaseModel):
         json_encoders = {ObjectId: str}
         populate_by_name = True
         arbitrary_types_allowed = True
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class JobRoleMatchResponse(BaseModel):
+    job_role_id: str
+    candidates_scored: int
+    elapsed_ms: float
+    results: List[CandidateSearchResult]
+    queued_for_evaluation: int = 0
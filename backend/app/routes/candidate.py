@@ -1,21 +1,31 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
-from app.models.candidate import CandidateBase, CandidateCreate, CandidateResponse
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, Response
+from app.models.candidate import (CandidateBase, CandidateCreate, CandidateResponse, CandidateSearchResult,
+                                  EvaluationStatus, BulkUploadItem, BulkUploadResponse)
 from app.database import Database
 from app.routes.auth import get_current_user
 from app.models.user import User
 from app.utils.mongo_utils import convert_id
-from typing import List
+from app.utils.ai_forward import index_candidate_cv, search_candidates
+from app.utils.ai_worker import ai_worker_pool, AIWorkerError
+from app.utils.http_client import DownloadTooLarge
+from app.utils.storage import save_file, read_file, StorageError
+from app.utils.evaluation_queue import evaluation_queue
+from typing import BinaryIO, List, Optional, Tuple, Union
 from datetime import datetime
-import cloudinary
-import cloudinary.uploader
 import os
-import requests
-import tempfile
-import subprocess
+import httpx
 import json
+import asyncio
+import hashlib
+import io
+import mimetypes
+import time
+import zipfile
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 import logging
 from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
 
 # Load environment variables
 load_dotenv()
@@ -23,93 +33,221 @@ load_dotenv()
 router = APIRouter()
 db = Database()
 
-# Cloudinary config with proper error handling
-cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
-api_key = os.getenv("CLOUDINARY_API_KEY")
-api_secret = os.getenv("CLOUDINARY_API_SECRET")
+# Skill pre-screen mode passed to the AI parser: off, report or enforce
+AI_PRESCREEN_MODE = os.getenv("AI_PRESCREEN_MODE", "report")
+# Recruiters only see their own candidates, so their searches over-fetch before filtering
+SEARCH_OVERFETCH = int(os.getenv("SEARCH_OVERFETCH", "3"))
+# Bulk uploads: files accepted per request, files stored at once, and candidates per insert_many
+BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", "500"))
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "8"))
+BULK_INSERT_BATCH = int(os.getenv("BULK_INSERT_BATCH", "100"))
+MAX_CV_BYTES = int(os.getenv("MAX_CV_BYTES", str(20 * 1024 * 1024)))
+# CVs up to this size are handed to the evaluation queue in memory; larger ones are read back from storage
+EVALUATION_PAYLOAD_MAX_BYTES = int(os.getenv("EVALUATION_PAYLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+# Total CV bytes (uncompressed) read from one bulk upload
+BULK_UPLOAD_MAX_BYTES = int(os.getenv("BULK_UPLOAD_MAX_BYTES", str(500 * 1024 * 1024)))
+ZIP_READ_CHUNK = 64 * 1024
+HASH_READ_CHUNK = 1024 * 1024
+CV_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
 
-if not all([cloud_name, api_key, api_secret]):
-    raise ValueError("Missing Cloudinary credentials. Please check your .env file.")
+# --- Helpers: download a stored CV and evaluate it on the warm AI worker pool ---
+async def download_cv(cv_url: str) -> Tuple[bytes, str]:
+    """Read a stored CV into memory from the storage backend; returns (content, filename).
 
-cloudinary.config(
-    cloud_name=cloud_name,
-    api_key=api_key,
-    api_secret=api_secret
-)
-
-# --- Helper: Call AI parser (rag.py) ---
-async def parse_cv_with_ai(cv_url: str, job_description: str) -> dict:
-    """Parse a CV using the AI script."""
+    The filename carries the extension the AI pipeline picks its parser by.
+    """
     try:
-        # Download the CV from Cloudinary
-        response = requests.get(cv_url)
-        if response.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to download CV from Cloudinary")
-
-        # Get file extension from URL
-        file_ext = os.path.splitext(cv_url)[1].lower()
-        if not file_ext:
-            # If no extension in URL, try to determine from content type
-            content_type = response.headers.get('content-type', '').lower()
-            if 'pdf' in content_type:
-                file_ext = '.pdf'
-            elif 'msword' in content_type or 'docx' in content_type:
-                file_ext = '.docx'
-            else:
-                raise HTTPException(status_code=400, detail="Unsupported file type")
+        content, content_type = await read_file(cv_url)
+    except (httpx.HTTPError, DownloadTooLarge, StorageError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Failed to download CV from storage: {str(e)}")
 
-        # Create temporary file with correct extension
-        with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as tmp:
-            tmp.write(response.content)
-            tmp_path = tmp.name
+    filename = os.path.basename(urlparse(cv_url).path) or "cv"
+    if not os.path.splitext(filename)[1]:
+        # If no extension in URL, try to determine from content type
+        content_type = content_type.lower()
+        if 'pdf' in content_type:
+            filename += '.pdf'
+        elif 'msword' in content_type or 'docx' in content_type:
+            filename += '.docx'
+        else:
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+    return content, filename
 
-        try:
-            # Call the AI script
-            result = subprocess.run(
-                ["python", "AI/rag.py", "--cv", tmp_path, "--job", job_description],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Parse the output
-            output = result.stdout.strip()
-            if not output:
-                raise ValueError("AI script returned empty output")
-                
-            # Parse the structured output
-            parsed_result = parse_output(output)
-            
-            # Clean up temporary file
-            os.unlink(tmp_path)
-            
-            return parsed_result
+async def evaluate_cv(content: bytes, filename: str, job_description: str, skills: Optional[List[str]] = None,
+                      education: Optional[str] = None) -> dict:
+    """Evaluate a CV's bytes on a warm AI worker (see utils/ai_worker.py)."""
+    try:
+        result = await ai_worker_pool.evaluate(
+            content, filename, job_description, skills=skills, prescreen_mode=AI_PRESCREEN_MODE, education=education
+        )
+        if result.get("eligibility") == "error":
+            raise AIWorkerError(result.get("reason", "AI evaluation failed"))
+        return result
+    except Exception as e:
+        logging.error(f"Error parsing CV: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to parse CV: {str(e)}"
+        )
 
-        except subprocess.CalledProcessError as e:
-            logger.error(f"AI script failed: {e.stderr}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"AI parsing failed: {e.stderr}"
-            )
-        finally:
-            # Ensure temporary file is cleaned up
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+def hash_file(fileobj: BinaryIO) -> Tuple[str, int]:
+    """SHA-256 and size of a binary file object, read from the start in chunks; leaves it rewound."""
+    digest, size = hashlib.sha256(), 0
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(HASH_READ_CHUNK), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
 
+async def store_cv(content: Union[bytes, BinaryIO], filename: str) -> str:
+    """Store a CV with the configured backend (see utils/storage.py) and return its URL."""
+    try:
+        cv_url = await save_file(content, filename)
+        logging.info(f"File uploaded successfully to storage: {cv_url}")
+        return cv_url
     except Exception as e:
-        logger.error(f"Error parsing CV: {str(e)}")
+        logging.error(f"Storage upload failed: {str(e)}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to parse CV: {str(e)}"
+            detail=f"Failed to upload file to storage: {str(e)}"
         )
 
-@router.post("/candidates/upload", response_model=CandidateResponse)
+def build_candidate_doc(ai_result: Optional[dict], filename: str, cv_url: str, recruiter_id: str,
+                        job_role_id: str, job_role_title: str) -> dict:
+    """Candidate document for an AI result; ai_result=None stores the candidate as pending analysis."""
+    candidate_doc = {
+        "cv_url": cv_url,
+        "recruiter_id": recruiter_id,
+        "job_role_id": job_role_id,
+        "job_role_title": job_role_title,
+        "created_at": datetime.utcnow(),
+    }
+    if ai_result is None:
+        candidate_doc.update({
+            "candidate_name": filename,
+            "degree": "Pending",
+            "course": "Pending",
+            "cgpa": "Pending",
+            "ats_score": 0,
+            "strengths": [],
+            "weaknesses": [],
+            "feedback": "Pending AI analysis",
+            "detailed_feedback": "Pending AI analysis",
+            "status": "pending",
+        })
+    elif ai_result.get("eligibility") == "not_eligible":
+        # Handle ineligible candidates
+        candidate_doc.update({
+            "candidate_name": ai_result["candidate_name"],
+            "degree": "Not Eligible",
+            "course": "Not Eligible",
+            "cgpa": "N/A",
+            "ats_score": 0,
+            "strengths": [],
+            "weaknesses": [],
+            "feedback": f"Not eligible: {ai_result['reason']}",
+            "detailed_feedback": f"Not eligible: {ai_result['reason']}",
+            "status": "rejected",
+        })
+    else:
+        # Handle eligible candidates
+        candidate_doc.update({
+            "candidate_name": ai_result["candidate_name"],
+            "degree": ai_result.get("degree", "Not specified"),
+            "course": ai_result.get("course", "Not specified"),
+            "cgpa": ai_result.get("cgpa", "Not specified"),
+            "ats_score": ai_result.get("ats_score", 0),
+            "strengths": ai_result.get("strengths", []),
+            "weaknesses": ai_result.get("weaknesses", []),
+            "feedback": ai_result.get("feedback", ""),
+            "detailed_feedback": ai_result.get("detailed_feedback", ""),
+            "status": "uploaded",
+        })
+    return candidate_doc
+
+# Fields copied from an earlier evaluation of the same CV for the same job role
+EVALUATION_FIELDS = (
+    "candidate_name", "degree", "course", "cgpa", "ats_score",
+    "strengths", "weaknesses", "feedback", "detailed_feedback", "status",
+)
+# Candidates whose stored fields are not a finished evaluation
+UNEVALUATED_STATUSES = ("pending", "evaluation_failed")
+
+async def enqueue_evaluation(candidate_doc: dict, job_description: str, skills: Optional[List[str]],
+                             filename: str, content_type: str, content: Optional[bytes] = None,
+                             education: Optional[str] = None) -> bool:
+    """Queue the AI evaluation (and search indexing) of a stored pending candidate.
+
+    skills and education are the job role's requirements, checked by the AI pre-screen.
+    """
+    return await evaluation_queue.enqueue(str(candidate_doc["_id"]), {
+        "job_role_id": candidate_doc["job_role_id"],
+        "cv_url": candidate_doc["cv_url"],
+        "filename": filename,
+        "content_type": content_type,
+        "job_description": job_description,
+        "skills": skills,
+        "education": education,
+    }, content)
+
+async def process_evaluation_job(job: dict, content: Optional[bytes]):
+    """Evaluation queue handler: score the CV, store the result on the candidate and index it.
+
+    Raising fails the attempt, which the queue retries; content is None when the upload was made
+    to another backend process, in which case the CV is downloaded from storage.
+    """
+    collection = db.get_collection("candidates")
+    candidate = await collection.find_one({"_id": ObjectId(job["candidate_id"])})
+    if candidate is None:
+        logging.info(f"Candidate {job['candidate_id']} no longer exists; dropping its evaluation")
+        return
+    filename = job["filename"]
+    if content is None:
+        content, filename = await download_cv(job["cv_url"])
+
+    ai_result = await evaluate_cv(content, filename, job["job_description"], job.get("skills"), job.get("education"))
+    evaluation = build_candidate_doc(
+        ai_result, filename, job["cv_url"], candidate["recruiter_id"], job["job_role_id"], candidate["job_role_title"]
+    )
+    update = {field: evaluation[field] for field in EVALUATION_FIELDS}
+    update["evaluated_at"] = datetime.utcnow()
+    await collection.update_one({"_id": candidate["_id"]}, {"$set": update})
+
+    # Add the CV to the role's search index; a failure here must not fail the evaluation
+    try:
+        await index_candidate_cv(job["job_role_id"], job["candidate_id"], content, filename, job["content_type"])
+    except Exception as e:
+        logging.error(f"Indexing CV for search failed: {str(e)}")
+
+async def record_failed_evaluation(job: dict, error: str):
+    """Evaluation queue dead-letter hook: mark the candidate so it is not mistaken for pending."""
+    await db.get_collection("candidates").update_one(
+        {"_id": ObjectId(job["candidate_id"])},
+        {"$set": {"status": "evaluation_failed", "feedback": f"AI evaluation failed: {error}"}}
+    )
+
+@router.post("/candidates/upload", response_model=CandidateResponse, status_code=202)
 async def upload_candidate_cv(
+    response: Response,
     job_role_id: str = Form(...),
     job_description: str = Form(...),
     file: UploadFile = File(...),
+    force_reevaluate: bool = Form(False),
     current_user: User = Depends(get_current_user)
 ):
+    """Upload a CV for a job role and queue its evaluation.
+
+    Returns 202 with the candidate stored as pending; GET /{candidate_id}/evaluation reports the
+    queued job's progress. Identical files (by SHA-256) already uploaded for the role reuse the
+    stored cv_url and evaluation and return 200; force_reevaluate=true queues a new evaluation but
+    still skips the re-upload.
+    """
     if current_user.role != "recruiter":
         raise HTTPException(status_code=403, detail="Only recruiters can upload CVs.")
     
@@ -121,114 +259,88 @@ async def upload_candidate_cv(
             detail="Invalid file type. Only PDF, DOC, and DOCX files are allowed."
         )
     
-    # Upload file to Cloudinary
     try:
-        # Read file content
-        file_content = await file.read()
-        if not file_content:
+        # Hashed straight from the spooled upload, which is never read into memory whole
+        cv_sha256, file_size = await asyncio.to_thread(hash_file, file.file)
+        if not file_size:
             raise HTTPException(status_code=400, detail="Empty file uploaded")
-            
-        # Upload to Cloudinary with specific resource type
-        try:
-            result = cloudinary.uploader.upload(
-                file_content,
-                resource_type="raw",  # Use raw for all document types
-                folder="cv_uploads",
-                type="upload",
-                public_id=f"{file.filename.split('.')[0]}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
-                format=file.filename.split('.')[-1].lower()  # Preserve original format
-            )
-            cv_url = result["secure_url"]
-            logging.info(f"File uploaded successfully to Cloudinary: {cv_url}")
-        except Exception as e:
-            logging.error(f"Cloudinary upload failed: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to upload file to storage: {str(e)}"
-            )
-        
+
         # Get job role title
         job_role = await db.get_collection("job_roles").find_one({"_id": ObjectId(job_role_id)})
         if not job_role:
             raise HTTPException(status_code=404, detail="Job role not found")
+
+        collection = db.get_collection("candidates")
+        recruiter_id = str(current_user.id)
+        # Prefer this recruiter's own copy, then any completed evaluation, then the newest
+        duplicates = await collection.find(
+            {"job_role_id": job_role_id, "cv_sha256": cv_sha256}
+        ).sort("created_at", -1).to_list(length=None)
+        own = next((c for c in duplicates if c["recruiter_id"] == recruiter_id), None)
+        evaluated = next((c for c in duplicates if c.get("status") not in UNEVALUATED_STATUSES), None)
+        existing = own or evaluated or (duplicates[0] if duplicates else None)
+
+        if own is not None and own.get("status") not in UNEVALUATED_STATUSES and not force_reevaluate:
+            logging.info(f"Duplicate CV {cv_sha256} for job role {job_role_id}; returning existing candidate {own['_id']}")
+            response.status_code = 200
+            return CandidateResponse(**convert_id(own))
+
+        if existing is not None:
+            cv_url = existing["cv_url"]
+            logging.info(f"Duplicate CV {cv_sha256} for job role {job_role_id}; reusing stored file {cv_url}")
+        else:
+            # Stored from the spooled upload in chunks
+            await file.seek(0)
+            cv_url = await store_cv(file.file, file.filename)
+
+        candidate_doc = build_candidate_doc(None, file.filename, cv_url, recruiter_id, job_role_id, job_role["title"])
+        needs_evaluation = evaluated is None or force_reevaluate
+        if not needs_evaluation:
+            # Another recruiter's upload of the same CV: copy its evaluation instead of re-scoring
+            candidate_doc.update({field: evaluated[field] for field in EVALUATION_FIELDS if field in evaluated})
+        candidate_doc["cv_sha256"] = cv_sha256
         
-        # Parse CV with AI
+        # Store candidate in DB; a re-evaluation of this recruiter's own upload replaces it in place
         try:
-            ai_result = await parse_cv_with_ai(cv_url, job_description)
-            logging.info(f"AI parsing result: {ai_result}")
-            
-            # Handle ineligible candidates
-            if ai_result.get("eligibility") == "not_eligible":
-                candidate_doc = {
-                    "candidate_name": ai_result["candidate_name"],
-                    "degree": "Not Eligible",
-                    "course": "Not Eligible",
-                    "cgpa": "N/A",
-                    "ats_score": 0,
-                    "strengths": [],
-                    "weaknesses": [],
-                    "feedback": f"Not eligible: {ai_result['reason']}",
-                    "detailed_feedback": f"Not eligible: {ai_result['reason']}",
-                    "cv_url": cv_url,
-                    "recruiter_id": str(current_user.id),
-                    "job_role_id": job_role_id,
-                    "job_role_title": job_role["title"],
-                    "status": "rejected",
-                    "created_at": datetime.utcnow(),
-                }
+            if own is not None:
+                candidate_doc.pop("created_at")
+                await collection.update_one({"_id": own["_id"]}, {"$set": candidate_doc})
+                candidate_doc = {**own, **candidate_doc}
             else:
-                # Handle eligible candidates
-                candidate_doc = {
-                    "candidate_name": ai_result["candidate_name"],
-                    "degree": ai_result.get("degree", "Not specified"),
-                    "course": ai_result.get("course", "Not specified"),
-                    "cgpa": ai_result.get("cgpa", "Not specified"),
-                    "ats_score": ai_result.get("ats_score", 0),
-                    "strengths": ai_result.get("strengths", []),
-                    "weaknesses": ai_result.get("weaknesses", []),
-                    "feedback": ai_result.get("feedback", ""),
-                    "detailed_feedback": ai_result.get("detailed_feedback", ""),
-                    "cv_url": cv_url,
-                    "recruiter_id": str(current_user.id),
-                    "job_role_id": job_role_id,
-                    "job_role_title": job_role["title"],
-                    "status": "uploaded",
-                    "created_at": datetime.utcnow(),
-                }
-        except Exception as e:
-            logging.error(f"AI parsing failed: {str(e)}")
-            # If AI parsing fails, store with default values
-            candidate_doc = {
-                "candidate_name": file.filename,
-                "degree": "Pending",
-                "course": "Pending",
-                "cgpa": "Pending",
-                "ats_score": 0,
-                "strengths": [],
-                "weaknesses": [],
-                "feedback": "Pending AI analysis",
-                "detailed_feedback": "Pending AI analysis",
-                "cv_url": cv_url,
-                "recruiter_id": str(current_user.id),
-                "job_role_id": job_role_id,
-                "job_role_title": job_role["title"],
-                "status": "pending",
-                "created_at": datetime.utcnow(),
-            }
-        
-        # Store candidate in DB
-        try:
-            collection = db.get_collection("candidates")
-            insert_result = await collection.insert_one(candidate_doc)
-            candidate_doc["_id"] = insert_result.inserted_id
-            
-            return CandidateResponse(**convert_id(candidate_doc))
+                insert_result = await collection.insert_one(candidate_doc)
+                candidate_doc["_id"] = insert_result.inserted_id
         except Exception as e:
             logging.error(f"Database operation failed: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to store candidate data: {str(e)}"
             )
+
+        if needs_evaluation:
+            # Small CVs go to the queue worker in memory; larger ones are read back from storage
+            content = None
+            if file_size <= EVALUATION_PAYLOAD_MAX_BYTES:
+                await file.seek(0)
+                content = await file.read()
+            queued = await enqueue_evaluation(
+                candidate_doc, job_description, job_role.get("skills"), file.filename, file.content_type, content,
+                education=job_role.get("education")
+            )
+            if not queued:
+                logging.info(f"Evaluation of candidate {candidate_doc['_id']} is already queued")
+            return CandidateResponse(**convert_id(candidate_doc))
+
+        # Add the CV to the role's search index; a failure here must not fail the upload
+        try:
+            await file.seek(0)
+            await index_candidate_cv(
+                job_role_id, str(candidate_doc["_id"]), file.file, file.filename, file.content_type
+            )
+        except Exception as e:
+            logging.error(f"Indexing CV for search failed: {str(e)}")
+
+        response.status_code = 200
+        return CandidateResponse(**convert_id(candidate_doc))
             
     except HTTPException:
         raise
@@ -241,6 +353,275 @@ async def upload_candidate_cv(
     finally:
         await file.close()
 
+def is_zip_upload(file: UploadFile) -> bool:
+    return file.content_type in ZIP_CONTENT_TYPES or (file.filename or "").lower().endswith(".zip")
+
+def read_zip_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: int = MAX_CV_BYTES) -> bytes:
+    """Decompress one archive entry chunk by chunk, refusing it past max_bytes (sizes in headers can lie)."""
+    if info.file_size > max_bytes:
+        raise ValueError(f"File is larger than {max_bytes} bytes")
+    buffer = io.BytesIO()
+    with archive.open(info) as entry:
+        for chunk in iter(lambda: entry.read(ZIP_READ_CHUNK), b""):
+            if buffer.tell() + len(chunk) > max_bytes:
+                raise ValueError(f"File is larger than {max_bytes} bytes")
+            buffer.write(chunk)
+    return buffer.getvalue()
+
+async def iter_bulk_files(files: List[UploadFile], max_files: int = BULK_UPLOAD_MAX_FILES,
+                          max_bytes: int = BULK_UPLOAD_MAX_BYTES):
+    """Yield (filename, source archive, content, problem) for every CV in a bulk upload, one at a time.
+
+    ZIP archives are read entry by entry from the spooled upload, so only the entries currently
+    being processed are held in memory. content is None when the file is skipped, with the reason
+    in problem. Once max_files CVs or max_bytes of content have been read, the remaining files are
+    listed without being read, and an archive whose entries declare more than the remaining bytes
+    is skipped whole.
+    """
+    remaining_files, remaining_bytes = max_files, max_bytes
+
+    def over_quota(size: int) -> Optional[str]:
+        if remaining_files <= 0:
+            return f"Over the {max_files} file limit"
+        if size > remaining_bytes:
+            return f"Over the {max_bytes} byte limit per upload"
+        return None
+
+    for upload in files:
+        if not is_zip_upload(upload):
+            extension = os.path.splitext(upload.filename or "")[1].lower()
+            if extension not in CV_CONTENT_TYPES:
+                yield upload.filename, None, None, "Unsupported file type"
+                continue
+            problem = over_quota(upload.size or 0)
+            if problem:
+                yield upload.filename, None, None, problem
+                continue
+            content = await upload.read(MAX_CV_BYTES + 1)
+            problem = over_quota(len(content))
+            if not content:
+                yield upload.filename, None, None, "Empty file"
+            elif len(content) > MAX_CV_BYTES:
+                yield upload.filename, None, None, f"File is larger than {MAX_CV_BYTES} bytes"
+            elif problem:
+                yield upload.filename, None, None, problem
+            else:
+                remaining_files -= 1
+                remaining_bytes -= len(content)
+                yield upload.filename, None, content, None
+            continue
+
+        try:
+            archive = await asyncio.to_thread(zipfile.ZipFile, upload.file)
+        except zipfile.BadZipFile:
+            yield upload.filename, None, None, "Not a valid ZIP archive"
+            continue
+        with archive:
+            entries = [
+                info for info in archive.infolist()
+                if not (info.is_dir() or info.filename.startswith("__MACOSX/")
+                        or os.path.basename(info.filename).startswith(".") or not os.path.basename(info.filename))
+            ]
+            declared = sum(info.file_size for info in entries
+                           if os.path.splitext(info.filename)[1].lower() in CV_CONTENT_TYPES)
+            if declared > remaining_bytes:
+                yield upload.filename, None, None, (f"Archive expands to {declared} bytes, over the "
+                                                    f"{max_bytes} byte limit per upload")
+                continue
+            for info in entries:
+                name = os.path.basename(info.filename)
+                if os.path.splitext(name)[1].lower() not in CV_CONTENT_TYPES:
+                    yield name, upload.filename, None, "Unsupported file type"
+                    continue
+                problem = over_quota(info.file_size)
+                if problem:
+                    yield name, upload.filename, None, problem
+                    continue
+                try:
+                    # Never more than the remaining budget, whatever the entry's header claims
+                    content = await asyncio.to_thread(read_zip_entry, archive, info, min(MAX_CV_BYTES, remaining_bytes))
+                except Exception as e:
+                    # Oversized, encrypted, corrupt or unsupported compression
+                    yield name, upload.filename, None, str(e)
+                    continue
+                if not content:
+                    yield name, upload.filename, None, "Empty file"
+                    continue
+                remaining_files -= 1
+                remaining_bytes -= len(content)
+                yield name, upload.filename, content, None
+
+@router.post("/candidates/bulk-upload", response_model=BulkUploadResponse, status_code=202)
+async def bulk_upload_candidate_cvs(
+    job_role_id: str = Form(...),
+    job_description: str = Form(...),
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user)
+):
+    """Upload many CVs (individual files and/or ZIP archives of them) for one job role.
+
+    Files are stored with bounded parallelism, the new candidates are inserted in batches with
+    insert_many as pending, and their evaluations are queued; the response is a per-file manifest.
+    Duplicates follow the single upload: CVs this recruiter already uploaded for the role are not
+    stored again, and an existing evaluation of the same file is copied instead of re-scored.
+    """
+    if current_user.role != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can upload CVs.")
+    if not ObjectId.is_valid(job_role_id):
+        raise HTTPException(status_code=400, detail="Invalid job role ID")
+    job_role = await db.get_collection("job_roles").find_one({"_id": ObjectId(job_role_id)})
+    if not job_role:
+        raise HTTPException(status_code=404, detail="Job role not found")
+
+    start = time.perf_counter()
+    collection = db.get_collection("candidates")
+    recruiter_id = str(current_user.id)
+    results: List[BulkUploadItem] = []
+    new_candidates = []  # (manifest index, candidate doc, content or None for oversized queued CVs)
+    first_seen = {}  # cv_sha256 -> manifest index of its first file in this upload
+
+    async def add_file(index: int, filename: str, content: bytes, cv_sha256: str):
+        item = results[index]
+        duplicates = await collection.find(
+            {"job_role_id": job_role_id, "cv_sha256": cv_sha256}
+        ).sort("created_at", -1).to_list(length=None)
+        own = next((c for c in duplicates if c["recruiter_id"] == recruiter_id), None)
+        if own is not None:
+            item.status = "duplicate"
+            item.candidate_id = str(own["_id"])
+            item.detail = "Already uploaded for this job role"
+            return
+        evaluated = next((c for c in duplicates if c.get("status") not in UNEVALUATED_STATUSES), None)
+        existing = evaluated or (duplicates[0] if duplicates else None)
+
+        cv_url = existing["cv_url"] if existing is not None else await store_cv(content, filename)
+        candidate_doc = build_candidate_doc(None, filename, cv_url, recruiter_id, job_role_id, job_role["title"])
+        candidate_doc["cv_sha256"] = cv_sha256
+        if evaluated is not None:
+            candidate_doc.update({field: evaluated[field] for field in EVALUATION_FIELDS if field in evaluated})
+            item.status = "copied"
+            new_candidates.append((index, candidate_doc, content))
+        else:
+            item.status = "queued"
+            new_candidates.append((index, candidate_doc, content if len(content) <= EVALUATION_PAYLOAD_MAX_BYTES else None))
+
+    pending = asyncio.Queue(maxsize=BULK_UPLOAD_CONCURRENCY)
+
+    async def worker():
+        while True:
+            entry = await pending.get()
+            if entry is None:
+                return
+            index, filename, content, cv_sha256 = entry
+            try:
+                await add_file(index, filename, content, cv_sha256)
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                logging.error(f"Bulk upload of {filename} failed: {detail}")
+                results[index].status = "error"
+                results[index].detail = detail
+
+    workers = [asyncio.create_task(worker()) for _ in range(BULK_UPLOAD_CONCURRENCY)]
+    try:
+        async for filename, source, content, problem in iter_bulk_files(files):
+            index = len(results)
+            item = BulkUploadItem(filename=filename or "unnamed", source=source, status="skipped", detail=problem)
+            results.append(item)
+            if content is None:
+                continue
+            # Identical files in one upload are settled here, before any of them reaches a worker
+            item.cv_sha256 = await asyncio.to_thread(lambda: hashlib.sha256(content).hexdigest())
+            if item.cv_sha256 in first_seen:
+                item.status = "duplicate"
+                item.detail = f"Same file as {results[first_seen[item.cv_sha256]].filename}"
+                continue
+            first_seen[item.cv_sha256] = index
+            item.status = "processing"
+            item.detail = None
+            await pending.put((index, item.filename, content, item.cv_sha256))
+    finally:
+        for _ in workers:
+            await pending.put(None)
+        await asyncio.gather(*workers)
+        for upload in files:
+            await upload.close()
+
+    # Insert in batches; ordered=False keeps going past a bad document
+    inserted = []
+    for batch_start in range(0, len(new_candidates), BULK_INSERT_BATCH):
+        batch = new_candidates[batch_start:batch_start + BULK_INSERT_BATCH]
+        failed = {}
+        try:
+            await collection.insert_many([candidate_doc for _, candidate_doc, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: error.get("errmsg", "Insert failed") for error in e.details.get("writeErrors", [])}
+        except Exception as e:
+            logging.error(f"Inserting bulk-uploaded candidates failed: {str(e)}")
+            failed = {position: str(e) for position in range(len(batch))}
+        for position, (index, candidate_doc, content) in enumerate(batch):
+            if position in failed:
+                results[index].status = "error"
+                results[index].detail = f"Failed to store candidate data: {failed[position]}"
+            else:
+                results[index].candidate_id = str(candidate_doc["_id"])
+                inserted.append((index, candidate_doc, content))
+
+    limit = asyncio.Semaphore(BULK_UPLOAD_CONCURRENCY)
+
+    async def follow_up(index: int, candidate_doc: dict, content: Optional[bytes]):
+        filename = results[index].filename
+        content_type = CV_CONTENT_TYPES[os.path.splitext(filename)[1].lower()]
+        async with limit:
+            try:
+                if results[index].status == "queued":
+                    # The queue worker evaluates from content when given; otherwise it reads the CV from storage
+                    await enqueue_evaluation(candidate_doc, job_description, job_role.get("skills"), filename, content_type,
+                                             content, education=job_role.get("education"))
+                else:
+                    await index_candidate_cv(job_role_id, str(candidate_doc["_id"]), content, filename, content_type)
+            except Exception as e:
+                # The candidate is stored; only its evaluation or search indexing is missing
+                logging.error(f"Bulk upload follow-up for candidate {candidate_doc['_id']} failed: {str(e)}")
+
+    await asyncio.gather(*(follow_up(*entry) for entry in inserted))
+
+    counts = {status: sum(1 for item in results if item.status == status) for status in ("queued", "copied", "duplicate")}
+    return BulkUploadResponse(
+        job_role_id=job_role_id,
+        received=len(results),
+        queued=counts["queued"],
+        copied=counts["copied"],
+        duplicates=counts["duplicate"],
+        failed=sum(1 for item in results if item.status in ("error", "skipped")),
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 3),
+        results=results
+    )
+
+async def evaluate_matched_candidates(job_role: dict, job_description: str, candidates: List[dict]):
+    """Queue full AI evaluation of shortlisted existing candidates against a new job role.
+
+    Each candidate is stored again under the new role (keeping its recruiter) as pending, and its
+    evaluation job also indexes it in the role's search. CVs already stored under the role are skipped.
+    """
+    job_role_id = str(job_role["_id"])
+    collection = db.get_collection("candidates")
+    for source in candidates:
+        cv_url = source.get("cv_url")
+        same_cv = [{"cv_url": cv_url}] + ([{"cv_sha256": source["cv_sha256"]}] if source.get("cv_sha256") else [])
+        if not cv_url or await collection.find_one({"job_role_id": job_role_id, "$or": same_cv}):
+            continue
+        filename = os.path.basename(urlparse(cv_url).path)
+        candidate_doc = build_candidate_doc(None, filename, cv_url, source["recruiter_id"], job_role_id, job_role["title"])
+        candidate_doc["matched_from"] = str(source["_id"])
+        if source.get("cv_sha256"):
+            candidate_doc["cv_sha256"] = source["cv_sha256"]
+        insert_result = await collection.insert_one(candidate_doc)
+        candidate_doc["_id"] = insert_result.inserted_id
+
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        await enqueue_evaluation(candidate_doc, job_description, job_role.get("skills"), filename, content_type,
+                                 education=job_role.get("education"))
+
 @router.get("/recruiter", response_model=List[CandidateResponse])
 async def get_recruiter_candidates(current_user: User = Depends(get_current_user)):
     try:
@@ -284,21 +665,100 @@ async def get_company_candidates(current_user: User = Depends(get_current_user))
     candidates = await collection.find({"job_role_id": {"$in": job_role_ids}}).to_list(length=None)
     return [CandidateResponse(**convert_id(c)) for c in candidates]
 
-@router.get("/{candidate_id}", response_model=CandidateResponse)
-async def get_candidate(candidate_id: str, current_user: User = Depends(get_current_user)):
+@router.get("/search", response_model=List[CandidateSearchResult])
+async def search_role_candidates(
+    job_role_id: str = Query(...),
+    q: str = Query(..., min_length=1),
+    k: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """Top-k candidates for a job role whose CVs best match a free-text query."""
+    if current_user.role not in ("recruiter", "hiring_manager"):
+        raise HTTPException(status_code=403, detail="Only recruiters and hiring managers can search candidates.")
+    if not ObjectId.is_valid(job_role_id):
+        raise HTTPException(status_code=400, detail="Invalid job role ID")
+
+    job_role = await db.get_collection("job_roles").find_one({"_id": ObjectId(job_role_id)})
+    if not job_role:
+        raise HTTPException(status_code=404, detail="Job role not found")
+    if current_user.role == "hiring_manager" and job_role["company_id"] != current_user.company_code:
+        raise HTTPException(status_code=403, detail="You don't have permission to search this job role")
+
+    fetch = k * SEARCH_OVERFETCH if current_user.role == "recruiter" else k
+    try:
+        hits = await search_candidates(job_role_id, q, fetch)
+    except Exception as e:
+        logging.error(f"Candidate search failed: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Candidate search failed: {str(e)}")
+
+    query = {"_id": {"$in": [ObjectId(hit["candidate_id"]) for hit in hits if ObjectId.is_valid(hit["candidate_id"])]}}
+    if current_user.role == "recruiter":
+        query["recruiter_id"] = str(current_user.id)
+    candidates = await db.get_collection("candidates").find(query).to_list(length=None)
+    by_id = {str(candidate["_id"]): candidate for candidate in candidates}
+
+    # Keep the index's ranking; hits for deleted or inaccessible candidates are skipped
+    results = []
+    for hit in hits:
+        candidate = by_id.get(hit["candidate_id"])
+        if candidate is None:
+            continue
+        results.append(CandidateSearchResult(
+            candidate=CandidateResponse(**convert_id(candidate)),
+            score=hit["score"],
+            snippet=hit.get("snippet")
+        ))
+        if len(results) == k:
+            break
+    return results
+
+async def get_visible_candidate(candidate_id: str, current_user: User) -> dict:
+    """The candidate, if the user may view it (recruiters only see their own)."""
     try:
         object_id = ObjectId(candidate_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid candidate ID")
-    
-    collection = db.get_collection("candidates")
-    candidate = await collection.find_one({"_id": object_id})
-    
+    candidate = await db.get_collection("candidates").find_one({"_id": object_id})
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    
-    # Check if user has permission to view this candidate
     if current_user.role == "recruiter" and str(candidate["recruiter_id"]) != str(current_user.id):
         raise HTTPException(status_code=403, detail="You don't have permission to view this candidate")
-    
-    return CandidateResponse(**convert_id(candidate)) 
\ No newline at end of file
+    return candidate
+
+def evaluation_status(job: dict) -> EvaluationStatus:
+    return EvaluationStatus(
+        candidate_id=job["candidate_id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        max_attempts=job["max_attempts"],
+        queue_position=job.get("queue_position"),
+        last_error=job.get("last_error"),
+        next_attempt_at=job["available_at"] if job["status"] == "queued" else None,
+        created_at=job.get("created_at"),
+        updated_at=job.get("updated_at"),
+        finished_at=job.get("finished_at"),
+    )
+
+@router.get("/{candidate_id}/evaluation", response_model=EvaluationStatus)
+async def get_evaluation_status(candidate_id: str, current_user: User = Depends(get_current_user)):
+    """Progress of a candidate's queued AI evaluation."""
+    await get_visible_candidate(candidate_id, current_user)
+    job = await evaluation_queue.status(candidate_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No evaluation has been queued for this candidate")
+    return evaluation_status(job)
+
+@router.post("/{candidate_id}/evaluation/retry", response_model=EvaluationStatus)
+async def retry_evaluation(candidate_id: str, current_user: User = Depends(get_current_user)):
+    """Re-queue a dead-lettered evaluation."""
+    candidate = await get_visible_candidate(candidate_id, current_user)
+    if not await evaluation_queue.retry(candidate_id):
+        raise HTTPException(status_code=409, detail="Only failed evaluations can be retried")
+    await db.get_collection("candidates").update_one(
+        {"_id": candidate["_id"]}, {"$set": {"status": "pending", "feedback": "Pending AI analysis"}}
+    )
+    return evaluation_status(await evaluation_queue.status(candidate_id))
+
+@router.get("/{candidate_id}", response_model=CandidateResponse)
+async def get_candidate(candidate_id: str, current_user: User = Depends(get_current_user)):
+    return CandidateResponse(**convert_id(await get_visible_candidate(candidate_id, current_user))) 
\ No newline at end of file
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, UploadFile, File, Form
-from utils.ai_forward import send_cv_to_ai_server
+from app.utils.ai_forward import send_cv_to_ai_server
 
 router = APIRouter()
 
 @router.post("/evaluate/")
 async def evaluate(cv: UploadFile = File(...), jd: str = Form(...)):
-    result = send_cv_to_ai_server(cv.file, jd)
+    result = await send_cv_to_ai_server(await cv.read(), jd)
     return result
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
 from typing import List
 from datetime import datetime
 from bson import ObjectId
 import logging
+import os
 from pymongo.errors import DuplicateKeyError
 
-from app.models.job_role import JobRoleModel, JobRoleCreate, JobRoleUpdate, JobRoleResponse
+from app.models.job_role import JobRoleModel, JobRoleCreate, JobRoleUpdate, JobRoleResponse, JobRoleMatchResponse
+from app.models.candidate import CandidateResponse, CandidateSearchResult
 from app.database import Database
 from app.routes.auth import get_current_user
 from app.models.user import User
 from app.utils.mongo_utils import convert_id
+from app.utils.ai_forward import drop_candidate_index, match_candidates
+from app.routes.candidate import evaluate_matched_candidates
 
 router = APIRouter()
 db = Database()
 
+# Upper bound on shortlisted candidates sent for full LLM evaluation by one match request
+MAX_MATCH_EVALUATIONS = int(os.getenv("MAX_MATCH_EVALUATIONS", "25"))
+
 def validate_object_id(job_id: str) -> ObjectId:
        """Validate and convert string ID to ObjectId."""
        if not ObjectId.is_valid(job_id):
@@ -56,6 +63,73 @@ async def create_job_role(job_role: JobRoleCreate, current_user: User = Depends(
             detail=f"A job role with title '{job_role.title}' already exists for your company. Please use a different title."
         )
 
+def role_description(job_role: dict) -> str:
+    """The text a job role's candidates are matched and evaluated against."""
+    parts = [job_role.get("title"), job_role.get("description"), job_role.get("requirements")]
+    return "\n".join(part for part in parts if part)
+
+@router.post("/{job_id}/matches", response_model=JobRoleMatchResponse)
+async def match_existing_candidates(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    k: int = Query(20, ge=1, le=200),
+    evaluate_top: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """Shortlist candidates from the company's other job roles for this role, ranked by embedding
+    similarity without LLM calls. The best evaluate_top are evaluated in full in the background."""
+    if current_user.role != "hiring_manager":
+        raise HTTPException(status_code=403, detail="Only hiring managers can match candidates to job roles")
+    if evaluate_top > min(k, MAX_MATCH_EVALUATIONS):
+        raise HTTPException(status_code=400, detail=f"evaluate_top must be at most {min(k, MAX_MATCH_EVALUATIONS)}")
+    object_id = validate_object_id(job_id)
+
+    collection = db.get_collection("job_roles")
+    job_role = await collection.find_one({"_id": object_id, "company_id": current_user.company_code})
+    if not job_role:
+        raise HTTPException(status_code=404, detail="Job role not found")
+    other_roles = await collection.find(
+        {"company_id": current_user.company_code, "_id": {"$ne": object_id}}, {"_id": 1}
+    ).to_list(length=None)
+    if not other_roles:
+        return JobRoleMatchResponse(job_role_id=job_id, candidates_scored=0, elapsed_ms=0.0, results=[])
+
+    description = role_description(job_role)
+    try:
+        matched = await match_candidates(
+            [str(role["_id"]) for role in other_roles], description, job_role.get("skills"), k
+        )
+    except Exception as e:
+        logging.error(f"Candidate matching failed for job role {job_id}: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Candidate matching failed: {str(e)}")
+
+    hits = [hit for hit in matched["results"] if ObjectId.is_valid(hit["candidate_id"])]
+    candidates = await db.get_collection("candidates").find(
+        {"_id": {"$in": [ObjectId(hit["candidate_id"]) for hit in hits]}}
+    ).to_list(length=None)
+    by_id = {str(candidate["_id"]): candidate for candidate in candidates}
+    shortlist = [(hit, by_id[hit["candidate_id"]]) for hit in hits if hit["candidate_id"] in by_id]
+
+    if evaluate_top:
+        background_tasks.add_task(
+            evaluate_matched_candidates, job_role, description, [candidate for _, candidate in shortlist[:evaluate_top]]
+        )
+
+    return JobRoleMatchResponse(
+        job_role_id=job_id,
+        candidates_scored=matched["candidates_scored"],
+        elapsed_ms=matched["elapsed_ms"],
+        results=[
+            CandidateSearchResult(
+                candidate=CandidateResponse(**convert_id(dict(candidate))),
+                score=hit["score"],
+                snippet=hit.get("snippet")
+            )
+            for hit, candidate in shortlist
+        ],
+        queued_for_evaluation=min(evaluate_top, len(shortlist))
+    )
+
 @router.get("/", response_model=List[JobRoleResponse])
 async def get_job_roles(current_user: User = Depends(get_current_user)):
     logging.info(f"Fetching job roles for company: {current_user.company_code}")
@@ -136,6 +210,12 @@ async def delete_job_role(job_id: str, current_user: User = Depends(get_current_
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Job role not found")
+
+    # The role's candidate search index is no longer reachable; failing to drop it only wastes disk
+    try:
+        await drop_candidate_index(job_id)
+    except Exception as e:
+        logging.error(f"Failed to drop candidate index for job role {job_id}: {str(e)}")
     
     return {"message": "Job role deleted successfully"}
 
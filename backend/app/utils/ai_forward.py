@@ -1,9 +1,57 @@
-import requests
+import os
+from dotenv import load_dotenv
+from app.utils.http_client import get_http_client
+
+load_dotenv()
 
 AI_API_URL = "https://cv-align.onrender.com/analyze/"  # replace with your deployed Render URL
 
-def send_cv_to_ai_server(cv_file, jd_text):
+# Base URL of the AI server, which also hosts the per-job-role candidate search index
+AI_SERVER_URL = os.getenv("AI_SERVER_URL", "https://cv-align.onrender.com").rstrip("/")
+AI_INDEX_TIMEOUT = float(os.getenv("AI_INDEX_TIMEOUT", "60"))
+AI_EVALUATE_TIMEOUT = float(os.getenv("AI_EVALUATE_TIMEOUT", "180"))
+
+# All calls go through the shared pooled client (utils/http_client.py), so the connection to the
+# AI server is reused between requests
+
+async def send_cv_to_ai_server(cv_file, jd_text):
     files = {"cv": ("cv.pdf", cv_file, "application/pdf")}
     data = {"job_description": jd_text}
-    response = requests.post(AI_API_URL, files=files, data=data)
+    response = await get_http_client().post(AI_API_URL, files=files, data=data, timeout=AI_EVALUATE_TIMEOUT)
+    return response.json()
+
+async def index_candidate_cv(job_role_id, candidate_id, file_content, filename, content_type):
+    """Add a candidate's CV to the job role's semantic search index on the AI server."""
+    response = await get_http_client().post(
+        f"{AI_SERVER_URL}/api/index/{job_role_id}/candidates",
+        files={"cv": (filename, file_content, content_type)},
+        data={"candidate_id": candidate_id},
+        timeout=AI_INDEX_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+async def search_candidates(job_role_id, query, k=10):
+    """Indexed candidates for a job role ranked by semantic similarity to a free-text query."""
+    response = await get_http_client().get(
+        f"{AI_SERVER_URL}/api/index/{job_role_id}/search",
+        params={"q": query, "k": k},
+        timeout=AI_INDEX_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()["results"]
+
+async def match_candidates(job_role_ids, description, skills=None, k=20):
+    """Shortlist candidates indexed under job_role_ids for a role description (no LLM calls)."""
+    response = await get_http_client().post(
+        f"{AI_SERVER_URL}/api/match",
+        json={"job_role_ids": job_role_ids, "description": description, "skills": skills or [], "k": k},
+        timeout=AI_INDEX_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+async def drop_candidate_index(job_role_id):
+    response = await get_http_client().delete(f"{AI_SERVER_URL}/api/index/{job_role_id}", timeout=AI_INDEX_TIMEOUT)
+    response.raise_for_status()
     return response.json()
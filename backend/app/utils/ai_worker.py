@@ -0,0 +1,233 @@
+"""Warm pool of AI evaluation worker processes.
+
+Each worker imports the AI pipeline (AI/ai_server/rag.py) once at start-up and keeps its model
+clients and caches warm, so evaluating a CV costs only the evaluation rather than a fresh
+interpreter plus all of its imports. Jobs run one per worker, which bounds concurrency; a job
+that exceeds its timeout gets its worker killed and replaced, and a worker that crashes is
+replaced and the job retried once on a fresh worker.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir))
+AI_SERVER_DIR = os.getenv("AI_SERVER_DIR", os.path.join(REPO_ROOT, "AI", "ai_server"))
+AI_WORKERS = int(os.getenv("AI_WORKERS", "2"))
+AI_JOB_TIMEOUT = float(os.getenv("AI_JOB_TIMEOUT", "180"))
+AI_WORKER_START_TIMEOUT = float(os.getenv("AI_WORKER_START_TIMEOUT", "120"))
+# Workers are recycled after this many jobs so slow leaks in the AI stack cannot grow unbounded
+AI_WORKER_MAX_JOBS = int(os.getenv("AI_WORKER_MAX_JOBS", "500"))
+
+# Forking a process that already runs an event loop and the Mongo client's threads is unsafe
+_context = multiprocessing.get_context("spawn")
+
+
+class AIWorkerError(RuntimeError):
+    """The AI pipeline could not evaluate a CV."""
+
+
+class AIWorkerTimeout(AIWorkerError):
+    pass
+
+
+def _worker_main(conn, ai_server_dir, quota_share):
+    """Worker process: import and warm the pipeline once, then evaluate jobs until told to stop."""
+    sys.path.insert(0, ai_server_dir)
+    # Every worker has its own LLM scheduler, so each may only spend its share of the provider quota
+    os.environ["LLM_QUOTA_SHARE"] = str(int(os.getenv("LLM_QUOTA_SHARE", "1")) * quota_share)
+    try:
+        import rag
+        from cv_document import CVDocument
+        rag.registry.warm()
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+        data, filename, job_description, skills, prescreen_mode, education = job
+        try:
+            cv = CVDocument.from_bytes(data, filename)
+            try:
+                result = rag.analyze_cv(
+                    cv, job_description, skills=skills, prescreen_mode=prescreen_mode, education=education
+                )
+            finally:
+                cv.close()
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """Parent-side handle on one worker process; its methods block and run on a thread."""
+
+    def __init__(self, quota_share: int = 1):
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(
+            target=_worker_main, args=(child_conn, AI_SERVER_DIR, quota_share), name="ai-worker", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def wait_ready(self, timeout: float):
+        if not self.conn.poll(timeout):
+            raise AIWorkerError(f"AI worker did not start within {timeout:.0f}s")
+        status, detail = self.conn.recv()
+        if status != "ready":
+            raise AIWorkerError(f"AI worker failed to start: {detail}")
+
+    def run(self, job, timeout: float) -> dict:
+        """Evaluate one job. EOFError/OSError mean the process died; AIWorkerTimeout that it hung."""
+        self.conn.send(job)
+        if not self.conn.poll(timeout):
+            raise AIWorkerTimeout(f"AI evaluation timed out after {timeout:.0f}s")
+        status, payload = self.conn.recv()
+        self.jobs += 1
+        if status != "ok":
+            raise AIWorkerError(payload)
+        return payload
+
+    def stop(self, graceful: bool = True):
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+                self.process.join(5)
+            except OSError:
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+
+class AIWorkerPool:
+    """Fixed number of warm workers handed out through a queue of idle slots.
+
+    A slot holds a live worker, or None when its worker failed to start; such slots spawn a new
+    worker when next used, so the pool recovers once the AI stack becomes importable again.
+    """
+
+    def __init__(self, size: int = AI_WORKERS, job_timeout: float = AI_JOB_TIMEOUT):
+        self.size = size
+        self.job_timeout = job_timeout
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers = set()
+        # Replacements run in the background; held here so they are not garbage collected mid-run
+        self._tasks = set()
+        self._start_lock = asyncio.Lock()
+
+    async def _spawn(self) -> Optional[_Worker]:
+        worker = None
+        try:
+            worker = await asyncio.to_thread(_Worker, self.size)
+            await asyncio.to_thread(worker.wait_ready, AI_WORKER_START_TIMEOUT)
+        except Exception as e:
+            logging.error(f"Starting AI worker failed: {str(e)}")
+            if worker is not None:
+                await asyncio.to_thread(worker.stop, False)
+            return None
+        self._workers.add(worker)
+        logging.info(f"AI worker {worker.process.pid} ready")
+        return worker
+
+    async def start(self):
+        """Spawn and warm all workers concurrently; safe to call more than once."""
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            idle = asyncio.Queue()
+            for worker in await asyncio.gather(*(self._spawn() for _ in range(self.size))):
+                idle.put_nowait(worker)
+            self._idle = idle
+
+    async def _retire(self, worker: _Worker, graceful: bool):
+        self._workers.discard(worker)
+        await asyncio.to_thread(worker.stop, graceful)
+
+    def _in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _release(self, idle: asyncio.Queue, worker: Optional[_Worker]):
+        """Hand a worker (or empty slot) back to the queue it came from, or stop it if the pool was closed since."""
+        if idle is self._idle:
+            idle.put_nowait(worker)
+        elif worker is not None:
+            self._in_background(self._retire(worker, graceful=True))
+
+    async def _replace(self, idle: asyncio.Queue, worker: _Worker, graceful: bool):
+        """Stop a worker and put a fresh one (or an empty slot) back in the pool."""
+        await self._retire(worker, graceful)
+        self._release(idle, await self._spawn() if idle is self._idle else None)
+
+    async def _run(self, job) -> dict:
+        idle = self._idle
+        worker = await idle.get()
+        for attempt in range(2):
+            if worker is None:
+                worker = await self._spawn()
+                if worker is None:
+                    self._release(idle, None)
+                    raise AIWorkerError("No AI worker available")
+            try:
+                result = await asyncio.to_thread(worker.run, job, self.job_timeout)
+            except AIWorkerTimeout:
+                logging.error(f"AI worker {worker.process.pid} timed out; restarting it")
+                self._in_background(self._replace(idle, worker, graceful=False))
+                raise
+            except AIWorkerError:
+                # The job failed but the worker is healthy
+                self._release(idle, worker)
+                raise
+            except (EOFError, OSError) as e:
+                logging.error(f"AI worker {worker.process.pid} crashed ({type(e).__name__}); restarting it")
+                await self._retire(worker, graceful=False)
+                worker = None
+                # A worker stopped by close() looks like a crash; the job is not retried then
+                if attempt == 0 and idle is self._idle:
+                    continue
+                self._release(idle, None)
+                raise AIWorkerError("AI worker crashed while evaluating the CV")
+            if worker.jobs >= AI_WORKER_MAX_JOBS:
+                self._in_background(self._replace(idle, worker, graceful=True))
+            else:
+                self._release(idle, worker)
+            return result
+
+    async def evaluate(self, data: bytes, filename: str, job_description: str,
+                       skills: Optional[List[str]] = None, prescreen_mode: str = "report",
+                       education: Optional[str] = None) -> dict:
+        """Evaluate a CV's bytes against a job description on a warm worker."""
+        if self._idle is None:
+            await self.start()
+        # Shielded so a cancelled request still returns its worker to the pool when the job ends
+        task = asyncio.ensure_future(self._run((data, filename, job_description, skills, prescreen_mode, education)))
+        return await asyncio.shield(task)
+
+    async def close(self):
+        """Stop every worker. A running job gets 5s to finish before its worker is killed and it fails;
+        workers that jobs or pending replacements hand back afterwards are stopped as well."""
+        workers, self._workers = list(self._workers), set()
+        self._idle = None
+        await asyncio.gather(*(asyncio.to_thread(worker.stop) for worker in workers))
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+ai_worker_pool = AIWorkerPool()
@@ -0,0 +1,237 @@
+"""Durable, Mongo-backed queue of CV evaluation jobs.
+
+Uploads store the candidate as pending, enqueue a job here and return at once. Workers in every
+backend process claim jobs atomically (find_one_and_update), run them and record the outcome on
+the job. A job whose worker died is claimed again once its lease expires; a job that fails is
+retried with exponential backoff and dead-lettered (status "failed") after max_attempts, where it
+stays until it is explicitly retried.
+"""
+import asyncio
+import logging
+import os
+import socket
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.database import Database
+
+load_dotenv()
+
+JOBS_COLLECTION = "evaluation_jobs"
+
+# Concurrent jobs per backend process; more than the AI worker pool only adds queueing there
+EVALUATION_QUEUE_WORKERS = int(os.getenv("EVALUATION_QUEUE_WORKERS", os.getenv("AI_WORKERS", "2")))
+EVALUATION_MAX_ATTEMPTS = int(os.getenv("EVALUATION_MAX_ATTEMPTS", "4"))
+# Retry delay in seconds, doubled after every failed attempt
+EVALUATION_RETRY_BASE = float(os.getenv("EVALUATION_RETRY_BASE", "30"))
+EVALUATION_RETRY_MAX = float(os.getenv("EVALUATION_RETRY_MAX", "1800"))
+# A claimed job is handed to another worker after this long, so it must exceed AI_JOB_TIMEOUT
+EVALUATION_LEASE_SECONDS = float(os.getenv("EVALUATION_LEASE_SECONDS", "600"))
+# Idle workers look for due jobs (retries, other processes' uploads) this often
+EVALUATION_POLL_INTERVAL = float(os.getenv("EVALUATION_POLL_INTERVAL", "5"))
+# Uploads to this process keep their bytes here so the worker need not download them again; the
+# oldest are dropped past either bound (a whole bulk upload should fit)
+EVALUATION_PAYLOAD_CACHE = int(os.getenv("EVALUATION_PAYLOAD_CACHE", "512"))
+EVALUATION_PAYLOAD_CACHE_BYTES = int(os.getenv("EVALUATION_PAYLOAD_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = [QUEUED, RUNNING]
+
+JobHandler = Callable[[dict, Optional[bytes]], Awaitable[None]]
+FailureHandler = Callable[[dict, str], Awaitable[None]]
+
+
+def retry_delay(attempts: int) -> float:
+    return min(EVALUATION_RETRY_MAX, EVALUATION_RETRY_BASE * 2 ** max(0, attempts - 1))
+
+
+class EvaluationQueue:
+    """One job per candidate, keyed by candidate_id."""
+
+    def __init__(self, workers: int = EVALUATION_QUEUE_WORKERS, max_attempts: int = EVALUATION_MAX_ATTEMPTS):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handler: Optional[JobHandler] = None
+        self._on_failed: Optional[FailureHandler] = None
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._payloads = OrderedDict()
+        self._payload_bytes = 0
+
+    @staticmethod
+    def _collection():
+        return Database.get_collection(JOBS_COLLECTION)
+
+    async def enqueue(self, candidate_id: str, job: dict, content: Optional[bytes] = None) -> bool:
+        """Queue an evaluation of candidate_id; False if one is already queued or running.
+
+        job holds what the handler needs (cv_url, filename, job_description, ...); content is the
+        CV's bytes when this process has them in memory.
+        """
+        now = datetime.utcnow()
+        fields = {
+            **job,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "available_at": now,
+            "lease_expires_at": None,
+            "worker_id": None,
+            "last_error": None,
+            "finished_at": None,
+            "updated_at": now,
+        }
+        try:
+            # A finished or dead-lettered job for the candidate is reset; an active one is left alone
+            await self._collection().update_one(
+                {"candidate_id": candidate_id, "status": {"$nin": ACTIVE_STATUSES}},
+                {"$set": fields, "$setOnInsert": {"created_at": now}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        if content is not None:
+            self._drop_payload(candidate_id)
+            self._payloads[candidate_id] = content
+            self._payload_bytes += len(content)
+            while len(self._payloads) > EVALUATION_PAYLOAD_CACHE or self._payload_bytes > EVALUATION_PAYLOAD_CACHE_BYTES:
+                self._drop_payload(next(iter(self._payloads)))
+        self._wakeup.set()
+        return True
+
+    def _drop_payload(self, candidate_id: str) -> Optional[bytes]:
+        content = self._payloads.pop(candidate_id, None)
+        if content is not None:
+            self._payload_bytes -= len(content)
+        return content
+
+    async def claim(self) -> Optional[dict]:
+        """Atomically take the oldest due job, or one whose previous worker's lease has expired."""
+        now = datetime.utcnow()
+        return await self._collection().find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "available_at": {"$lte": now}},
+                {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker_id": self.worker_id,
+                    "lease_expires_at": now + timedelta(seconds=EVALUATION_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job: dict, update: dict):
+        # Guarded by worker_id so a worker whose lease was taken over cannot overwrite the new run
+        update["updated_at"] = datetime.utcnow()
+        await self._collection().update_one(
+            {"_id": job["_id"], "status": RUNNING, "worker_id": self.worker_id}, {"$set": update}
+        )
+
+    async def _fail(self, job: dict, error: str):
+        if job["attempts"] < job["max_attempts"]:
+            delay = retry_delay(job["attempts"])
+            logging.warning(f"Evaluation of candidate {job['candidate_id']} failed (attempt {job['attempts']}), "
+                            f"retrying in {delay:.0f}s: {error}")
+            await self._finish(job, {
+                "status": QUEUED, "last_error": error, "lease_expires_at": None,
+                "available_at": datetime.utcnow() + timedelta(seconds=delay),
+            })
+            return
+        logging.error(f"Evaluation of candidate {job['candidate_id']} dead-lettered after {job['attempts']} attempts: {error}")
+        await self._finish(job, {
+            "status": FAILED, "last_error": error, "lease_expires_at": None, "finished_at": datetime.utcnow()
+        })
+        if self._on_failed is not None:
+            try:
+                await self._on_failed(job, error)
+            except Exception as e:
+                logging.error(f"Recording failed evaluation of candidate {job['candidate_id']} failed: {str(e)}")
+
+    async def _run(self, job: dict):
+        content = self._drop_payload(job["candidate_id"])
+        if job["attempts"] > job["max_attempts"]:
+            # Only reachable through expired leases, i.e. the job keeps killing or hanging its worker
+            job["attempts"] = job["max_attempts"]
+            await self._fail(job, job.get("last_error") or "Worker lease expired on every attempt")
+            return
+        try:
+            await self._handler(job, content)
+        except Exception as e:
+            await self._fail(job, str(e) or type(e).__name__)
+            return
+        await self._finish(job, {
+            "status": DONE, "last_error": None, "lease_expires_at": None, "finished_at": datetime.utcnow()
+        })
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self.claim()
+            except Exception as e:
+                logging.error(f"Claiming an evaluation job failed: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), EVALUATION_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    def start(self, handler: JobHandler, on_failed: Optional[FailureHandler] = None):
+        """Start this process's workers; handler(job, content) raises to fail an attempt."""
+        if self._tasks:
+            return
+        self._handler = handler
+        self._on_failed = on_failed
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logging.info(f"Started {self.workers} evaluation queue workers ({self.worker_id})")
+
+    async def stop(self):
+        """Stop claiming jobs; jobs cut short here are picked up again when their lease expires."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def status(self, candidate_id: str) -> Optional[dict]:
+        """The candidate's job, with its position among due queued jobs while it waits."""
+        job = await self._collection().find_one({"candidate_id": candidate_id})
+        if job is None:
+            return None
+        job["queue_position"] = None
+        if job["status"] == QUEUED:
+            job["queue_position"] = await self._collection().count_documents(
+                {"status": QUEUED, "available_at": {"$lt": job["available_at"]}}
+            ) + 1
+        return job
+
+    async def retry(self, candidate_id: str) -> bool:
+        """Put a dead-lettered job back in the queue with a fresh set of attempts."""
+        now = datetime.utcnow()
+        result = await self._collection().update_one(
+            {"candidate_id": candidate_id, "status": FAILED},
+            {"$set": {"status": QUEUED, "attempts": 0, "available_at": now, "finished_at": None, "updated_at": now}}
+        )
+        if result.modified_count:
+            self._wakeup.set()
+        return bool(result.modified_count)
+
+
+evaluation_queue = EvaluationQueue()
@@ -0,0 +1,101 @@
+"""Shared async HTTP client for outbound calls (CV downloads, the AI server).
+
+One httpx.AsyncClient is created at app startup and reused by every request, so connections to
+Cloudinary and the AI server are kept alive and pooled instead of being set up per CV. HTTP/2 is
+negotiated when the optional h2 package is installed.
+"""
+import importlib.util
+import io
+import logging
+import os
+from typing import BinaryIO, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+# auto uses HTTP/2 when h2 is installed; true/false force it on or off
+HTTP2 = os.getenv("HTTP2", "auto").lower()
+# Downloads larger than this are refused rather than buffered
+MAX_DOWNLOAD_BYTES = int(os.getenv("MAX_DOWNLOAD_BYTES", str(20 * 1024 * 1024)))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class DownloadTooLarge(ValueError):
+    pass
+
+
+def _http2_enabled() -> bool:
+    if HTTP2 == "auto":
+        return importlib.util.find_spec("h2") is not None
+    return HTTP2 in ("1", "true", "yes")
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = _http2_enabled()
+    logging.info(f"Creating shared HTTP client (http2={http2})")
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        follow_redirects=True,
+    )
+
+
+async def start_http_client():
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def close_http_client():
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client; created on first use when the app's startup hook has not run (scripts)."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+async def download_to(url: str, fileobj: BinaryIO, max_bytes: int = MAX_DOWNLOAD_BYTES) -> str:
+    """Stream url into fileobj chunk by chunk and return the response's content type.
+
+    Raises httpx.HTTPStatusError for error responses and DownloadTooLarge past max_bytes.
+    """
+    async with get_http_client().stream("GET", url) as response:
+        response.raise_for_status()
+        declared = int(response.headers.get("content-length") or 0)
+        if declared > max_bytes:
+            raise DownloadTooLarge(f"{url} is {declared} bytes, over the {max_bytes} byte limit")
+        received = 0
+        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+            received += len(chunk)
+            if received > max_bytes:
+                raise DownloadTooLarge(f"{url} exceeds the {max_bytes} byte limit")
+            fileobj.write(chunk)
+        return response.headers.get("content-type", "")
+
+
+async def download_bytes(url: str, max_bytes: int = MAX_DOWNLOAD_BYTES) -> Tuple[bytes, str]:
+    """Stream url into memory; returns (content, content type)."""
+    buffer = io.BytesIO()
+    content_type = await download_to(url, buffer, max_bytes)
+    return buffer.getvalue(), content_type
@@ -0,0 +1,173 @@
+"""Where uploaded CVs are stored: Cloudinary, or a local directory for offline use.
+
+STORAGE_BACKEND picks the implementation. Both take a binary file object and copy it in chunks on
+a worker thread, so storing a CV neither blocks the event loop nor needs a second in-memory copy
+of the file. The local backend keeps files under LOCAL_STORAGE_DIR, served by the app itself at
+LOCAL_STORAGE_URL, so the backend can be run and load-tested without network access.
+"""
+import asyncio
+import io
+import logging
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from app.utils.http_client import download_bytes
+
+load_dotenv()
+
+# cloudinary or local
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary").lower()
+STORAGE_FOLDER = "cv_uploads"
+# Files larger than this go to Cloudinary in chunks of this size (Cloudinary's minimum is 5 MB)
+CLOUDINARY_CHUNK_SIZE = int(os.getenv("CLOUDINARY_CHUNK_SIZE", str(6 * 1024 * 1024)))
+LOCAL_STORAGE_DIR = os.path.abspath(os.getenv(
+    "LOCAL_STORAGE_DIR", os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "storage")
+))
+# Path the app serves LOCAL_STORAGE_DIR under, and the public URL it is reachable at
+LOCAL_STORAGE_PATH = "/files"
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", f"http://localhost:8000{LOCAL_STORAGE_PATH}").rstrip("/")
+COPY_CHUNK_SIZE = 1024 * 1024
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+_storage = None
+
+
+class StorageError(RuntimeError):
+    pass
+
+
+def _file_size(fileobj: BinaryIO) -> int:
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell() - position
+    fileobj.seek(position)
+    return size
+
+
+def _split_filename(filename: str) -> Tuple[str, str]:
+    stem, extension = os.path.splitext(os.path.basename(filename or "cv"))
+    return stem or "cv", extension.lower()
+
+
+class CloudinaryStorage:
+    name = "cloudinary"
+
+    def __init__(self):
+        cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
+        api_key = os.getenv("CLOUDINARY_API_KEY")
+        api_secret = os.getenv("CLOUDINARY_API_SECRET")
+        if not all([cloud_name, api_key, api_secret]):
+            raise StorageError("Missing Cloudinary credentials. Please check your .env file "
+                               "or set STORAGE_BACKEND=local.")
+        import cloudinary
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret)
+
+    def _upload(self, fileobj: BinaryIO, filename: str) -> str:
+        import cloudinary.uploader
+        stem, extension = _split_filename(filename)
+        options = dict(
+            resource_type="raw",  # Use raw for all document types
+            folder=STORAGE_FOLDER,
+            type="upload",
+            # The uuid keeps same-named CVs stored in the same second from overwriting each other
+            public_id=f"{stem}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}",
+            overwrite=False,
+            format=extension.lstrip("."),  # Preserve original format
+        )
+        if _file_size(fileobj) > CLOUDINARY_CHUNK_SIZE:
+            result = cloudinary.uploader.upload_large(fileobj, chunk_size=CLOUDINARY_CHUNK_SIZE, **options)
+        else:
+            result = cloudinary.uploader.upload(fileobj, **options)
+        return result["secure_url"]
+
+    async def save(self, fileobj: BinaryIO, filename: str) -> str:
+        return await asyncio.to_thread(self._upload, fileobj, filename)
+
+    async def read(self, url: str) -> Tuple[bytes, str]:
+        return await download_bytes(url)
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_URL):
+        self.root = root
+        self.base_url = base_url
+        os.makedirs(os.path.join(self.root, STORAGE_FOLDER), exist_ok=True)
+
+    def _write(self, fileobj: BinaryIO, filename: str) -> str:
+        stem, extension = _split_filename(filename)
+        # Keys become URL paths, so anything but a plain name character is replaced
+        stem = re.sub(r"[^A-Za-z0-9._-]+", "_", stem)
+        key = f"{STORAGE_FOLDER}/{stem}_{uuid.uuid4().hex}{re.sub(r'[^a-z0-9.]', '', extension)}"
+        path = os.path.join(self.root, key)
+        # Written under a temporary name so a half-written file is never served
+        partial = f"{path}.part"
+        with open(partial, "wb") as destination:
+            shutil.copyfileobj(fileobj, destination, COPY_CHUNK_SIZE)
+        os.replace(partial, path)
+        return f"{self.base_url}/{key}"
+
+    def _path(self, url: str) -> Optional[str]:
+        """The file behind one of this backend's URLs; None for URLs it did not issue."""
+        if not url.startswith(f"{self.base_url}/"):
+            return None
+        path = os.path.realpath(os.path.join(self.root, urlparse(url[len(self.base_url) + 1:]).path))
+        if not path.startswith(os.path.realpath(self.root) + os.sep):
+            raise StorageError(f"{url} is outside the storage directory")
+        return path
+
+    def _load(self, path: str) -> Tuple[bytes, str]:
+        with open(path, "rb") as f:
+            content = f.read()
+        return content, CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+    async def save(self, fileobj: BinaryIO, filename: str) -> str:
+        return await asyncio.to_thread(self._write, fileobj, filename)
+
+    async def read(self, url: str) -> Tuple[bytes, str]:
+        path = self._path(url)
+        if path is None:
+            # CVs stored before switching backends are still fetched from where they live
+            return await download_bytes(url)
+        try:
+            return await asyncio.to_thread(self._load, path)
+        except FileNotFoundError:
+            raise StorageError(f"{url} does not exist")
+
+
+BACKENDS = {backend.name: backend for backend in (CloudinaryStorage, LocalStorage)}
+
+
+def get_storage():
+    """The configured backend, created on first use; raises StorageError when misconfigured."""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND not in BACKENDS:
+            raise StorageError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; use one of {', '.join(BACKENDS)}")
+        _storage = BACKENDS[STORAGE_BACKEND]()
+        logging.info(f"Storing CVs with the {STORAGE_BACKEND} backend")
+    return _storage
+
+
+async def save_file(content: Union[bytes, BinaryIO], filename: str) -> str:
+    """Store a CV from bytes or a binary file object (read from its current position); returns its URL."""
+    fileobj = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    return await get_storage().save(fileobj, filename)
+
+
+async def read_file(url: str) -> Tuple[bytes, str]:
+    """A stored CV's (content, content type)."""
+    return await get_storage().read(url)